@@ -1,166 +1,553 @@
 # app/api/routes/v1/process_calls/routes.py
 
-from typing import Optional
-import os
+import json
 import uuid
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile
+from contextlib import nullcontext
+from typing import Any, AsyncIterator, Awaitable, Callable, Literal, Optional, Union
+from fastapi import APIRouter, Header, HTTPException, Request, status, Depends, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from app.utils.logger_util import logger
+from app.utils.request_context import bind_job_id
 from app.schemas.process_call_and_email import (
     ProcessConvocallForm,
     ProcessConvocallEmailForm,
+    ProcessConvocallLanguagesForm,
     ProcessConvocallResponse,
     ProcessConvocallEmailResponse,
+    ProcessConvocallWithEmailResponse,
+    BatchJob,
+    BatchResponse,
+    JobSubmitResponse,
+    JobStatusResponse,
 )
-from app.dependencies import ProcessCallServiceDep, ProcessEmailServiceDep
+from app.dependencies import (
+    admission_slot,
+    ProcessCallServiceDep,
+    ProcessEmailServiceDep,
+    UnadmittedProcessCallServiceDep,
+    UnadmittedProcessEmailServiceDep,
+    ProcessCallWithEmailServiceDep,
+    BatchProcessServiceDep,
+    JobQueueServiceDep,
+)
+from app.core.config import generation_settings, idempotency_settings
+from app.service.job_queue import JobQueueService
+from app.utils.jd_store import save_upload, UploadTooLargeError
+from app.utils import script_cache, idempotency
 
 router = APIRouter()
 
 
+async def _store_jdfile(jdfile: Optional[UploadFile]) -> Optional[str]:
+    """Stream the uploaded JD (if any) into the JD store and return its stored name."""
+    if not jdfile:
+        return None
+
+    try:
+        return await save_upload(jdfile)
+    except UploadTooLargeError as e:
+        logger.error(f"Rejected uploaded file: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Failed to save uploaded file: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save uploaded file: {str(e)}"
+        )
+
+
+def _format_sse(event: dict) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+
+
+async def _sse_stream(events: AsyncIterator[dict], response_model: type[BaseModel]) -> AsyncIterator[str]:
+    """Format service events as server-sent events, validating the final result."""
+    async for event in events:
+        if event["event"] == "result":
+            try:
+                data = response_model.model_validate(event["data"]).model_dump(by_alias=True)
+            except ValidationError as e:
+                logger.error(f"Streamed result failed validation: {e}")
+                yield _format_sse({"event": "error", "data": {"detail": "Generated output did not match the response schema"}})
+                return
+            event = {"event": "result", "data": data}
+        yield _format_sse(event)
+
+
+def _sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _queue_with_callback(
+    queue_service: JobQueueService,
+    job_type: Literal["convocall", "email"],
+    form_data: Union[ProcessConvocallForm, ProcessConvocallEmailForm],
+    jdfile_name: Optional[str],
+) -> JSONResponse:
+    """Queue a form request whose result should be POSTed to its callback_url; answers 202."""
+    job = BatchJob(
+        type=job_type,
+        job_id=form_data.job_id,
+        transcript_text=form_data.transcript_text,
+        env=form_data.env,
+        vendor_id=form_data.vendor_id,
+        intent_id=form_data.intent_id,
+        language_code=form_data.language_code,
+        jdfile_name=jdfile_name,
+        bypass_cache=getattr(form_data, "bypass_cache", False),
+        generation_mode=form_data.generation_mode,
+        callback_url=form_data.callback_url,
+    )
+    try:
+        handle = await queue_service.submit(job)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.exception(f"Failed to queue {job_type} callback job: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job queue is unavailable"
+        )
+
+    logger.info(f"{job_type} request queued as {handle['id']} with callback")
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=handle)
+
+
+async def _release_idempotency_key(scope: str, idempotency_key: str, owner: str) -> None:
+    """Release a claimed key; a failure here must not hide the error that led to it."""
+    try:
+        await idempotency.release(scope, idempotency_key, owner)
+    except Exception as e:
+        logger.warning(f"Failed to release idempotency key {idempotency_key}; retries wait for its lease: {e}")
+
+
+async def _run_idempotent(
+    scope: str,
+    idempotency_key: Optional[str],
+    payload: dict,
+    response_model: type[BaseModel],
+    run: Callable[[], Awaitable[Any]],
+    vendor_id: Optional[str],
+):
+    """
+    Run a request at most once per Idempotency-Key.
+
+    The first request for a key runs and its response is stored; retries with
+    the same key replay it (or wait for the original to finish). Failed requests
+    are not stored, so a retry runs them again.
+
+    Admission is taken for vendor_id only when the request actually runs, so
+    replays and retries waiting on the original never use up a slot; None
+    skips it (queued callback requests are admitted when their job runs).
+    """
+    async def admitted_run():
+        async with admission_slot(vendor_id) if vendor_id else nullcontext():
+            return await run()
+
+    if not idempotency_key:
+        return await admitted_run()
+    if len(idempotency_key) > idempotency.MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be at most {idempotency.MAX_KEY_LENGTH} characters"
+        )
+
+    owner = uuid.uuid4().hex
+    try:
+        stored = await idempotency.claim(scope, idempotency_key, idempotency.fingerprint(scope, payload), owner)
+    except idempotency.IdempotencyKeyMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except idempotency.IdempotencyInProgressError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+            headers={"Retry-After": str(int(idempotency_settings.IDEMPOTENCY_POLL_INTERVAL_SECONDS) + 1)},
+        )
+    except Exception as e:
+        # the store is an optimization; without Mongo, run the request as before
+        logger.warning(f"Idempotency store unavailable, running request without it: {e}")
+        return await admitted_run()
+
+    if stored is not None:
+        return JSONResponse(
+            status_code=stored["status_code"],
+            content=stored["body"],
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    try:
+        result = await admitted_run()
+        if isinstance(result, JSONResponse):
+            status_code, body = result.status_code, json.loads(result.body)
+        else:
+            # same shape FastAPI sends for the route's response_model
+            status_code, body = status.HTTP_200_OK, response_model.model_validate(result).model_dump(mode="json", by_alias=True)
+    except BaseException:
+        # nothing to replay: free the key so a retry runs the request again
+        await _release_idempotency_key(scope, idempotency_key, owner)
+        raise
+
+    try:
+        await idempotency.complete(scope, idempotency_key, owner, status_code, body)
+    except Exception as e:
+        logger.warning(f"Failed to store response for idempotency key {idempotency_key}: {e}")
+        await _release_idempotency_key(scope, idempotency_key, owner)
+    return result
+
+
 @router.get("/health")
 async def health_check():
     logger.info("Health check endpoint called")
     return {"message": "API is running"}
 
 
-@router.post("/convocall", response_model=ProcessConvocallResponse)
+@router.delete("/cache/convocall")
+async def invalidate_convocall_cache():
+    logger.info("Convocall cache invalidation requested")
+    deleted = await script_cache.invalidate("convocall")
+    return {"deleted": deleted}
+
+
+@router.post(
+    "/convocall",
+    response_model=ProcessConvocallResponse,
+    responses={202: {"model": JobSubmitResponse, "description": "Queued; result will be POSTed to callback_url"}},
+)
 async def create_convocall(
-    service: ProcessCallServiceDep,
-    data: tuple[ProcessConvocallForm, Optional[UploadFile]] = Depends(ProcessConvocallForm.as_form)
+    service: UnadmittedProcessCallServiceDep,
+    queue_service: JobQueueServiceDep,
+    data: tuple[ProcessConvocallForm, Optional[UploadFile]] = Depends(ProcessConvocallForm.as_form),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
     form_data, jdfile = data
     logger.info("Convocall API hit")
     logger.info(f"Received Convocall request with data: {form_data.model_dump()}")
 
-    jdfile_name = None
-    file_path = None
+    jdfile_name = await _store_jdfile(jdfile)
 
-    # Handle uploaded file if present
-    if jdfile:
-        filename = jdfile.filename or ""
-        file_extension = os.path.splitext(filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        file_path = os.path.join(upload_dir, unique_filename)
+    async def run():
+        if form_data.callback_url:
+            return await _queue_with_callback(queue_service, "convocall", form_data, jdfile_name)
 
+        # Process the Convocall request
         try:
-            with open(file_path, "wb") as buffer:
-                content = await jdfile.read()
-                buffer.write(content)
-            jdfile_name = unique_filename
-            logger.info(f"Uploaded JD file saved as: {jdfile_name}")
+            result = await service.process_convocall_request(
+                transcript_text=form_data.transcript_text,
+                jdfile_name=jdfile_name,
+                env=form_data.env,
+                vendor_id=form_data.vendor_id,
+                intent_id=form_data.intent_id,
+                language_code=form_data.language_code,
+                bypass_cache=form_data.bypass_cache,
+                generation_mode=form_data.generation_mode,
+            )
+
+            if not result.get("success"):
+                logger.error(f"Convocall processing failed: {result.get('error')}")
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=result.get("error", "Failed to process request"),
+                )
+
+            logger.info("Convocall processed successfully")
+            return result["data"]
+
+        except HTTPException:
+            raise
         except Exception as e:
-            logger.error(f"Failed to save uploaded file: {e}")
+            logger.exception(f"Internal server error during Convocall: {e}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to save uploaded file: {str(e)}"
+                detail=f"Internal server error: {str(e)}"
             )
 
-    # Process the Convocall request
+    return await _run_idempotent(
+        "convocall",
+        idempotency_key,
+        {**form_data.model_dump(), "jdfile_name": jdfile_name},
+        ProcessConvocallResponse,
+        run,
+        vendor_id=None if form_data.callback_url else form_data.vendor_id,
+    )
+
+
+@router.post("/convocall/stream")
+async def stream_convocall(
+    service: ProcessCallServiceDep,
+    data: tuple[ProcessConvocallForm, Optional[UploadFile]] = Depends(ProcessConvocallForm.as_form)
+):
+    """
+    Same input as /convocall, answered as server-sent events: "token" events
+    carry model deltas, "status" marks the translation pass, and the stream
+    ends with a validated "result" (or an "error") event.
+    """
+    form_data, jdfile = data
+    logger.info("Convocall stream API hit")
+    logger.info(f"Received Convocall stream request with data: {form_data.model_dump()}")
+
+    jdfile_name = await _store_jdfile(jdfile)
+
+    events = service.stream_convocall_request(
+        transcript_text=form_data.transcript_text,
+        jdfile_name=jdfile_name,
+        env=form_data.env,
+        vendor_id=form_data.vendor_id,
+        intent_id=form_data.intent_id,
+        language_code=form_data.language_code,
+        bypass_cache=form_data.bypass_cache,
+        generation_mode=form_data.generation_mode,
+    )
+    return _sse_response(_sse_stream(events, ProcessConvocallResponse))
+
+
+@router.post("/convocall-languages", response_model=dict[str, ProcessConvocallResponse])
+async def create_convocall_languages(
+    service: ProcessCallServiceDep,
+    data: tuple[ProcessConvocallLanguagesForm, Optional[UploadFile]] = Depends(ProcessConvocallLanguagesForm.as_form)
+):
+    form_data, jdfile = data
+    logger.info("Convocall-languages API hit")
+    logger.info(f"Received Convocall-languages request with data: {form_data.model_dump()}")
+
+    jdfile_name = await _store_jdfile(jdfile)
+
+    # Generate the base script once, translate into each language concurrently
     try:
-        result = await service.process_convocall_request(
+        result = await service.process_convocall_languages_request(
             transcript_text=form_data.transcript_text,
             jdfile_name=jdfile_name,
             env=form_data.env,
+            language_codes=list(form_data.language_codes),
             vendor_id=form_data.vendor_id,
             intent_id=form_data.intent_id,
-            language_code=form_data.language_code,
+            bypass_cache=form_data.bypass_cache,
         )
 
         if not result.get("success"):
-            logger.error(f"Convocall processing failed: {result.get('error')}")
+            logger.error(f"Convocall-languages processing failed: {result.get('error')}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=result.get("error", "Failed to process request"),
             )
 
-        logger.info("Convocall processed successfully")
+        logger.info("Convocall-languages processed successfully")
         return result["data"]
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception(f"Internal server error during Convocall: {e}")
+        logger.exception(f"Internal server error during Convocall-languages: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
         )
-    finally:
-        if file_path and os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                logger.info(f"Temporary file deleted: {jdfile_name}")
-            except Exception as e:
-                logger.warning(f"Failed to delete temporary file {file_path}: {e}")
 
 
-@router.post("/convocall-email", response_model=ProcessConvocallEmailResponse)
+@router.post(
+    "/convocall-email",
+    response_model=ProcessConvocallEmailResponse,
+    responses={202: {"model": JobSubmitResponse, "description": "Queued; result will be POSTed to callback_url"}},
+)
 async def create_convocall_email(
-    service: ProcessEmailServiceDep,
-    data: tuple[ProcessConvocallEmailForm, Optional[UploadFile]] = Depends(ProcessConvocallEmailForm.as_form)
+    service: UnadmittedProcessEmailServiceDep,
+    queue_service: JobQueueServiceDep,
+    data: tuple[ProcessConvocallEmailForm, Optional[UploadFile]] = Depends(ProcessConvocallEmailForm.as_form),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
     form_data, jdfile = data
     logger.info("Convocall-email API hit")
     logger.info(f"Received Convocall-email request with data: {form_data.model_dump()}")
 
-    jdfile_name = None
-    file_path = None
+    jdfile_name = await _store_jdfile(jdfile)
 
-    # Handle uploaded file if present
-    if jdfile:
-        filename = jdfile.filename or ""
-        file_extension = os.path.splitext(filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        file_path = os.path.join(upload_dir, unique_filename)
+    async def run():
+        if form_data.callback_url:
+            return await _queue_with_callback(queue_service, "email", form_data, jdfile_name)
 
+        # Process the Convocall-email request
         try:
-            with open(file_path, "wb") as buffer:
-                content = await jdfile.read()
-                buffer.write(content)
-            jdfile_name = unique_filename
-            logger.info(f"Uploaded JD file saved as: {jdfile_name}")
+            result = await service.process_convocall_email_request(
+                transcript_text=form_data.transcript_text,
+                jdfile_name=jdfile_name,
+                env=form_data.env,
+                vendor_id=form_data.vendor_id,
+                intent_id=form_data.intent_id,
+                language_code=form_data.language_code,
+                generation_mode=form_data.generation_mode,
+            )
+
+            if not result.get("success"):
+                logger.error(f"Convocall-email failed: {result.get('error')}")
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=result.get("error", "Failed to process request"),
+                )
+
+            logger.info("Convocall-email processed successfully")
+            return result["data"]
+
+        except HTTPException:
+            raise
         except Exception as e:
-            logger.error(f"Failed to save uploaded file: {e}")
+            logger.exception(f"Internal server error during Convocall-email: {e}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to save uploaded file: {str(e)}"
+                detail=f"Internal server error: {str(e)}"
             )
 
-    # Process the Convocall-email request
+    return await _run_idempotent(
+        "convocall-email",
+        idempotency_key,
+        {**form_data.model_dump(), "jdfile_name": jdfile_name},
+        ProcessConvocallEmailResponse,
+        run,
+        vendor_id=None if form_data.callback_url else form_data.vendor_id,
+    )
+
+
+@router.post("/convocall-email/stream")
+async def stream_convocall_email(
+    service: ProcessEmailServiceDep,
+    data: tuple[ProcessConvocallEmailForm, Optional[UploadFile]] = Depends(ProcessConvocallEmailForm.as_form)
+):
+    """Same input as /convocall-email, answered as server-sent events (see /convocall/stream)."""
+    form_data, jdfile = data
+    logger.info("Convocall-email stream API hit")
+    logger.info(f"Received Convocall-email stream request with data: {form_data.model_dump()}")
+
+    jdfile_name = await _store_jdfile(jdfile)
+
+    events = service.stream_convocall_email_request(
+        transcript_text=form_data.transcript_text,
+        jdfile_name=jdfile_name,
+        env=form_data.env,
+        vendor_id=form_data.vendor_id,
+        intent_id=form_data.intent_id,
+        language_code=form_data.language_code,
+        generation_mode=form_data.generation_mode,
+    )
+    return _sse_response(_sse_stream(events, ProcessConvocallEmailResponse))
+
+
+@router.post("/convocall-with-email", response_model=ProcessConvocallWithEmailResponse)
+async def create_convocall_with_email(
+    service: ProcessCallWithEmailServiceDep,
+    data: tuple[ProcessConvocallForm, Optional[UploadFile]] = Depends(ProcessConvocallForm.as_form)
+):
+    form_data, jdfile = data
+    logger.info("Convocall-with-email API hit")
+    logger.info(f"Received Convocall-with-email request with data: {form_data.model_dump()}")
+
+    jdfile_name = await _store_jdfile(jdfile)
+
+    # One upload and one extraction, script and email generated concurrently
     try:
-        result = await service.process_convocall_email_request(
+        result = await service.process_convocall_with_email_request(
             transcript_text=form_data.transcript_text,
             jdfile_name=jdfile_name,
             env=form_data.env,
             vendor_id=form_data.vendor_id,
             intent_id=form_data.intent_id,
             language_code=form_data.language_code,
+            bypass_cache=form_data.bypass_cache,
+            generation_mode=form_data.generation_mode,
         )
 
         if not result.get("success"):
-            logger.error(f"Convocall-email failed: {result.get('error')}")
+            logger.error(f"Convocall-with-email processing failed: {result.get('error')}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=result.get("error", "Failed to process request"),
             )
 
-        logger.info("Convocall-email processed successfully")
+        logger.info("Convocall-with-email processed successfully")
         return result["data"]
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception(f"Internal server error during Convocall-email: {e}")
+        logger.exception(f"Internal server error during Convocall-with-email: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
         )
-    finally:
-        if file_path and os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                logger.info(f"Temporary file deleted: {jdfile_name}")
-            except Exception as e:
-                logger.warning(f"Failed to delete temporary file {file_path}: {e}")
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def create_batch(
+    service: BatchProcessServiceDep,
+    jobs: list[BatchJob],
+    stream: bool = False
+):
+    """
+    Run a JSON array of convocall / email jobs with bounded concurrency.
+
+    Returns per-job results in input order, or with ?stream=true streams them
+    as NDJSON lines in completion order (each line carries its input index).
+    """
+    logger.info(f"Batch API hit with {len(jobs)} jobs (stream={stream})")
+
+    if not jobs:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Batch must contain at least one job"
+        )
+    if len(jobs) > generation_settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds {generation_settings.BATCH_MAX_ITEMS} jobs"
+        )
+
+    if stream:
+        async def ndjson_lines() -> AsyncIterator[str]:
+            async for item in service.stream_batch(jobs):
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+    results = await service.process_batch(jobs)
+    failed = sum(1 for item in results if not item["success"])
+    logger.info(f"Batch processed: {len(results) - failed} succeeded, {failed} failed")
+    return {"results": results}
+
+
+@router.post("/jobs", response_model=JobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(request: Request, service: JobQueueServiceDep, job: BatchJob):
+    """Queue a convocall / email job and return its handle immediately; poll /jobs/{id} for the result."""
+    bind_job_id(request, job.job_id)
+    logger.info(f"Job submit API hit for {job.type} job")
+    try:
+        return await service.submit(job)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.exception(f"Failed to queue job: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job queue is unavailable"
+        )
+
+
+@router.get("/jobs/{queue_id}", response_model=JobStatusResponse)
+async def get_job(service: JobQueueServiceDep, queue_id: str):
+    job = await service.get(queue_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
@@ -1,3 +1,4 @@
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -18,11 +19,178 @@ class AppSettings(BaseSettings):
 class ApiKeysSettings(BaseSettings):
     OPENAI_API_KEY: str
     OPENAI_MODEL: str = "gpt-4.1-mini"
+    OPENAI_MAX_CONCURRENCY: int = 32
+    OPENAI_MAX_CONNECTIONS: int = 64
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 32
+    OPENAI_TIMEOUT_SECONDS: float = 60.0
+    # point at a compatible server (e.g. benchmarks/fake_upstreams.py) instead of api.openai.com
+    OPENAI_BASE_URL: Optional[str] = None
 
     model_config = _base_config
 
 class ExternalServiceSettings(BaseSettings):
     DOC_EXTRACT_API_URL: str
+    DOC_EXTRACT_TIMEOUT_SECONDS: float = 15.0
+    DOC_EXTRACT_MAX_RETRIES: int = 2
+    DOC_EXTRACT_BACKOFF_SECONDS: float = 0.5
+    DOC_EXTRACT_MAX_CONNECTIONS: int = 20
+    DOC_EXTRACT_CACHE_TTL_SECONDS: float = 3600.0
+    DOC_EXTRACT_CACHE_MAX_ENTRIES: int = 512
+    DOC_EXTRACT_LOCAL_ENABLED: bool = True
+    DOC_EXTRACT_LOCAL_WORKERS: int = 2
+    DOC_EXTRACT_LOCAL_TIMEOUT_SECONDS: float = 20.0
+    model_config = _base_config
+
+class UploadSettings(BaseSettings):
+    JD_STORE_DIR: str = "uploads"
+    MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    # whole request body, enforced before parsing; leave room above MAX_UPLOAD_BYTES for form fields
+    MAX_REQUEST_BYTES: int = 21 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    JD_STORE_MAX_BYTES: int = 512 * 1024 * 1024
+    JD_TEXT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # .tmp- files older than this are leftovers from crashed writes and are removed at startup
+    JD_STORE_TEMP_MAX_AGE_SECONDS: int = 3600
+
+    model_config = _base_config
+
+class GenerationSettings(BaseSettings):
+    # "translate": generate in English, then translate; "native": generate in the target language
+    GENERATION_LANGUAGE_MODE: Literal["translate", "native"] = "translate"
+    BATCH_MAX_CONCURRENCY: int = 8
+    BATCH_MAX_ITEMS: int = 500
+
+    model_config = _base_config
+
+class CacheSettings(BaseSettings):
+    SCRIPT_CACHE_ENABLED: bool = True
+    SCRIPT_CACHE_MEMORY_MAX_ENTRIES: int = 1024
+    SCRIPT_CACHE_MEMORY_TTL_SECONDS: float = 900.0
+    SCRIPT_CACHE_MONGO_TTL_SECONDS: int = 7 * 24 * 3600
+    TRANSLATION_MEMO_MEMORY_MAX_ENTRIES: int = 8192
+    TRANSLATION_MEMO_MEMORY_TTL_SECONDS: float = 24 * 3600.0
+
+    model_config = _base_config
+
+class JobQueueSettings(BaseSettings):
+    JOB_WORKER_ENABLED: bool = True
+    JOB_WORKER_CONCURRENCY: int = 4
+    JOB_LEASE_SECONDS: float = 120.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: float = 5.0
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_RETENTION_SECONDS: int = 7 * 24 * 3600
+
+    model_config = _base_config
+
+class WebhookSettings(BaseSettings):
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_MAX_ATTEMPTS: int = 5
+    WEBHOOK_BACKOFF_SECONDS: float = 1.0
+    WEBHOOK_MAX_CONNECTIONS: int = 50
+    # Comma-separated host allowlist for callback URLs; empty allows any public host
+    WEBHOOK_ALLOWED_HOSTS: str = ""
+    # allow loopback, private and link-local callback addresses (local development only)
+    WEBHOOK_ALLOW_PRIVATE_HOSTS: bool = False
+    # callbacks in flight at once, per process
+    WEBHOOK_DISPATCH_CONCURRENCY: int = 16
+
+    model_config = _base_config
+
+class LLMRoutingSettings(BaseSettings):
+    # "<provider>:<model>" targets; empty means ["openai:<OPENAI_MODEL>"]
+    LLM_DEFAULT_TARGETS: list[str] = []
+    # appended to every route's targets
+    LLM_FALLBACK_TARGETS: list[str] = []
+    # first match wins, e.g. [{"intent_id": "13", "targets": ["openai:gpt-4.1-nano", "openai:gpt-4.1-mini"]}];
+    # rules may set task (convocall/email/translation), intent_id, vendor_id and language
+    LLM_ROUTES: list[dict] = []
+    # extra OpenAI-compatible backends: {"name": {"base_url": "...", "api_key": "...", "max_concurrency": 16}}
+    LLM_EXTRA_PROVIDERS: dict[str, dict] = {}
+    LLM_ROUTER_EWMA_ALPHA: float = 0.2
+    # targets above this EWMA error rate, or cooling down, are tried after healthy ones
+    LLM_ROUTER_MAX_ERROR_RATE: float = 0.5
+    LLM_ROUTER_COOLDOWN_FAILURES: int = 3
+    LLM_ROUTER_COOLDOWN_SECONDS: float = 30
+    # a target's error rate halves for every this many seconds without calls, so one left idle can recover
+    LLM_ROUTER_ERROR_HALF_LIFE_SECONDS: float = 30
+    # share of calls that try a demoted, more preferred target first, to see whether it recovered
+    LLM_ROUTER_PROBE_RATE: float = 0.05
+    # how much configured order outweighs observed latency (0: fastest healthy target wins)
+    LLM_ROUTER_PREFERENCE_WEIGHT: float = 0.5
+    LLM_ROUTER_INITIAL_LATENCY_SECONDS: float = 5
+    # the local "fake" provider (canned answers, for tests and benchmarks only); routes to
+    # "fake:..." fail over to their fallbacks unless it is enabled
+    FAKE_LLM_ENABLED: bool = False
+    FAKE_LLM_LATENCY_SECONDS: float = 0.05
+    FAKE_LLM_ERROR_RATE: float = 0.0
+
+    model_config = _base_config
+
+class ResilienceSettings(BaseSettings):
+    # per-stage deadlines; 0 disables
+    LLM_DEADLINE_SECONDS: float = 45
+    DOC_EXTRACT_DEADLINE_SECONDS: float = 20
+    # hedging: fire a second LLM attempt once the first is slower than the observed quantile
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_QUANTILE: float = 0.95
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 2
+    # circuit breakers: consecutive failures to open, seconds before a probe; threshold 0 disables
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RESET_SECONDS: float = 30
+    DOC_EXTRACT_BREAKER_FAILURE_THRESHOLD: int = 5
+    DOC_EXTRACT_BREAKER_RESET_SECONDS: float = 30
+
+    model_config = _base_config
+
+class AdmissionSettings(BaseSettings):
+    ADMISSION_ENABLED: bool = True
+    # token buckets, in requests per second per worker
+    ADMISSION_GLOBAL_RATE: float = 20
+    ADMISSION_GLOBAL_BURST: float = 40
+    ADMISSION_VENDOR_RATE: float = 5
+    ADMISSION_VENDOR_BURST: float = 10
+    ADMISSION_MAX_VENDORS: int = 10000
+    # requests admitted and not yet finished
+    ADMISSION_MAX_IN_FLIGHT: int = 128
+    # shed requests whose estimated wait behind in-flight work exceeds this
+    ADMISSION_MAX_WAIT_SECONDS: float = 20
+    ADMISSION_INITIAL_DURATION_SECONDS: float = 8
+    ADMISSION_DURATION_EWMA_ALPHA: float = 0.2
+    # batch items and queued jobs wait this long for admission before failing, instead of a 429
+    ADMISSION_PACED_MAX_WAIT_SECONDS: float = 120
+
+    model_config = _base_config
+
+class IdempotencySettings(BaseSettings):
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600
+    # an in-progress key whose owner has not finished by then can be taken over
+    IDEMPOTENCY_LEASE_SECONDS: int = 300
+    # how long a retry waits on the in-progress original before answering 409
+    IDEMPOTENCY_WAIT_SECONDS: float = 30
+    IDEMPOTENCY_POLL_INTERVAL_SECONDS: float = 0.5
+
+    model_config = _base_config
+
+class LoggingSettings(BaseSettings):
+    LOG_QUEUE_MAX_SIZE: int = 10000
+    LOG_BATCH_SIZE: int = 200
+    LOG_FLUSH_INTERVAL_SECONDS: float = 1.0
+    # base name of per-process NDJSON files (<path>.<pid>) for log docs that cannot be queued or written;
+    # replayed at startup, empty drops them
+    LOG_SPILL_PATH: str = ""
+    LOG_BUFFER_MAX_ENTRIES_PER_REQUEST: int = 500
+    LOG_BUFFER_MAX_BYTES_PER_REQUEST: int = 256 * 1024
+    LOG_BUFFER_MAX_REQUESTS: int = 5000
+    LOG_BUFFER_MAX_AGE_SECONDS: int = 600
+    # fraction of requests whose INFO/DEBUG logs are kept; warnings and errors are always kept
+    LOG_INFO_SAMPLE_RATE: float = 1.0
+    # TTL on api_logs.created_at; 0 keeps logs forever
+    LOG_RETENTION_SECONDS: int = 30 * 24 * 3600
+    # write to api_logs_YYYYMMDD instead of a single api_logs collection
+    LOG_DAILY_COLLECTIONS: bool = False
+
     model_config = _base_config
 
 class DatabaseSettings(BaseSettings):    
@@ -36,6 +204,16 @@ class DatabaseSettings(BaseSettings):
 app_settings = AppSettings()
 api_keys_settings = ApiKeysSettings() # type: ignore
 external_service_settings = ExternalServiceSettings() # type: ignore
+upload_settings = UploadSettings()
+cache_settings = CacheSettings()
+generation_settings = GenerationSettings()
+job_queue_settings = JobQueueSettings()
+webhook_settings = WebhookSettings()
+llm_routing_settings = LLMRoutingSettings()
+resilience_settings = ResilienceSettings()
+admission_settings = AdmissionSettings()
+idempotency_settings = IdempotencySettings()
+logging_settings = LoggingSettings()
 
 db_settings = DatabaseSettings() # type: ignore
 
@@ -1,7 +1,7 @@
 # app/db/mongo_session.py
 
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from typing import Optional, Union
 
 from app.core.config import db_settings  # assuming you store MONGO_URI and DB name in config
 
@@ -23,3 +23,36 @@ def get_mongo_db() -> AsyncIOMotorDatabase:
     if not mongo_session.client:
         raise RuntimeError("MongoDB client not initialized")
     return mongo_session.client[db_settings.MONGO_DB_NAME]
+
+async def ensure_index(
+    collection: AsyncIOMotorCollection,
+    keys: Union[str, list[tuple[str, int]]],
+    name: str,
+    expire_after_seconds: Optional[int] = None,
+) -> None:
+    """
+    Create an index, or bring an existing one on the same keys in line with
+    the requested name and TTL. create_index alone cannot change an existing
+    index (IndexOptionsConflict), so a changed TTL is applied with collMod and
+    any other mismatch (e.g. a plain index becoming a TTL one) is dropped and
+    recreated.
+    """
+    key = [(keys, 1)] if isinstance(keys, str) else list(keys)
+    for existing_name, info in (await collection.index_information()).items():
+        same_key = [tuple(k) for k in info["key"]] == key
+        if existing_name != name and not same_key:
+            continue
+        existing_ttl = info.get("expireAfterSeconds")
+        if existing_name == name and same_key and existing_ttl == expire_after_seconds:
+            return
+        if existing_name == name and same_key and existing_ttl is not None and expire_after_seconds is not None:
+            await collection.database.command(
+                "collMod",
+                collection.name,
+                index={"name": name, "expireAfterSeconds": expire_after_seconds},
+            )
+            return
+        await collection.drop_index(existing_name)
+
+    options = {} if expire_after_seconds is None else {"expireAfterSeconds": expire_after_seconds}
+    await collection.create_index(key, name=name, **options)
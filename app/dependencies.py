@@ -1,25 +1,117 @@
 # app/api/routes/dependencies.py
 
-from typing import Annotated
-from fastapi import Depends
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Annotated, AsyncIterator
+from fastapi import Depends, HTTPException, Request, status
 
-from app.service.process_call_and_email import ProcessCallService, ProcessEmailService
+from app.service.process_call_and_email import (
+    ProcessCallService,
+    ProcessEmailService,
+    ProcessCallWithEmailService,
+    BatchProcessService,
+)
+from app.service.job_queue import JobQueueService
+from app.core.config import admission_settings
+from app.utils.admission import admission_controller, AdmissionRejectedError
+from app.utils.logger_util import logger
+
+# Admission control
+@asynccontextmanager
+async def admission_slot(vendor_id: str) -> AsyncIterator[None]:
+    """Hold an admission slot for the block, or fail fast with 429."""
+    if not admission_settings.ADMISSION_ENABLED:
+        yield
+        return
+
+    try:
+        admission_controller.check(vendor_id)
+    except AdmissionRejectedError as e:
+        logger.warning(f"{e} for vendor {vendor_id}; retry after {e.retry_after:.1f}s")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Server is at capacity, retry later",
+            headers={"Retry-After": str(max(1, math.ceil(min(e.retry_after, 3600))))},
+        )
+
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        admission_controller.release(time.monotonic() - started)
+
+async def admit_request(request: Request) -> AsyncIterator[None]:
+    """
+    Hold an admission slot for the whole request, or fail fast with 429.
+
+    vendor_id is read from the form FastAPI has already parsed for the route
+    (request.form() is cached), defaulting to "1" like the forms do.
+    """
+    vendor_id = "1"
+    if admission_settings.ADMISSION_ENABLED and "form" in request.headers.get("content-type", ""):
+        vendor_id = str((await request.form()).get("vendor_id") or "1")
+
+    async with admission_slot(vendor_id):
+        yield
+
+AdmissionDep = Depends(admit_request)
 
 # Service Dependency
-def get_process_call_service() -> ProcessCallService:
+def get_process_call_service(_: None = AdmissionDep) -> ProcessCallService:
     """
     Dependency injection for ProcessCallService.
-    Returns a new instance of the service for each request.
+    Returns a new instance of the service for each request, once admitted.
     """
     return ProcessCallService()
 
-def get_process_email_service() -> ProcessEmailService:
+def get_process_email_service(_: None = AdmissionDep) -> ProcessEmailService:
     """
     Dependency injection for ProcessEmailService.
-    Returns a new instance of the service for each request.
+    Returns a new instance of the service for each request, once admitted.
+    """
+    return ProcessEmailService()
+
+def get_process_call_with_email_service(_: None = AdmissionDep) -> ProcessCallWithEmailService:
     """
+    Dependency injection for ProcessCallWithEmailService.
+    Returns a new instance of the service for each request, once admitted.
+    """
+    return ProcessCallWithEmailService()
+
+def get_unadmitted_process_call_service() -> ProcessCallService:
+    """
+    ProcessCallService for routes that take admission_slot() themselves,
+    after the Idempotency-Key check, so replays and waiting retries do not
+    use up a slot.
+    """
+    return ProcessCallService()
+
+def get_unadmitted_process_email_service() -> ProcessEmailService:
+    """ProcessEmailService for routes that take admission_slot() themselves (see above)."""
     return ProcessEmailService()
 
+def get_batch_process_service() -> BatchProcessService:
+    """
+    Dependency injection for BatchProcessService.
+    Returns a new instance of the service for each request; every batch item
+    is admitted on its own as it starts (see run_generation_job).
+    """
+    return BatchProcessService()
+
+def get_job_queue_service() -> JobQueueService:
+    """
+    Dependency injection for JobQueueService.
+    Returns a new instance of the service for each request; queued jobs are
+    admitted when a worker runs them (see run_generation_job).
+    """
+    return JobQueueService()
+
 # Type alias for dependency injection
 ProcessCallServiceDep = Annotated[ProcessCallService, Depends(get_process_call_service)]
-ProcessEmailServiceDep = Annotated[ProcessEmailService, Depends(get_process_email_service)]
\ No newline at end of file
+ProcessEmailServiceDep = Annotated[ProcessEmailService, Depends(get_process_email_service)]
+ProcessCallWithEmailServiceDep = Annotated[ProcessCallWithEmailService, Depends(get_process_call_with_email_service)]
+UnadmittedProcessCallServiceDep = Annotated[ProcessCallService, Depends(get_unadmitted_process_call_service)]
+UnadmittedProcessEmailServiceDep = Annotated[ProcessEmailService, Depends(get_unadmitted_process_email_service)]
+BatchProcessServiceDep = Annotated[BatchProcessService, Depends(get_batch_process_service)]
+JobQueueServiceDep = Annotated[JobQueueService, Depends(get_job_queue_service)]
\ No newline at end of file
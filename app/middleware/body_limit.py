@@ -0,0 +1,64 @@
+# app/middleware/body_limit.py
+
+from typing import Optional
+
+from fastapi import HTTPException, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import upload_settings
+from app.utils.logger_util import logger
+
+
+class BodyLimitMiddleware:
+    """
+    Reject request bodies larger than MAX_REQUEST_BYTES before they are spooled.
+
+    A declared Content-Length over the limit is answered with 413 without
+    reading the body. Otherwise receive() counts body bytes as the route
+    consumes them and raises a 413 HTTPException once the limit is passed,
+    so chunked or mis-declared uploads are cut off too.
+    """
+    def __init__(self, app: ASGIApp, max_bytes: Optional[int] = None):
+        self.app = app
+        self.max_bytes = max_bytes if max_bytes is not None else upload_settings.MAX_REQUEST_BYTES
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body exceeds {self.max_bytes} bytes"
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > self.max_bytes:
+                    logger.error(f"Rejected request: declared Content-Length {declared} exceeds {self.max_bytes} bytes")
+                    response = JSONResponse(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        content={"detail": detail},
+                        headers={"Connection": "close"},
+                    )
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    logger.error(f"Rejected request: body exceeds {self.max_bytes} bytes")
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=detail,
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
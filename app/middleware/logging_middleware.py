@@ -1,92 +1,60 @@
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
 import uuid
-from typing import Optional, cast
-import json
+from urllib.parse import parse_qs
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.utils.logger_util import logger, request_id_ctx, job_id_ctx, mongo_handler
+from app.utils.request_context import request_state
+
+class LoggingMiddleware:
+    """
+    Pure ASGI middleware that creates a request ID and buffers all logs for that request.
+    job_id comes from the x-job-id/job_id headers or the job_id query param, or later
+    from bind_job_id(); the request body stream is left untouched.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware that creates request ID and buffers all logs for that request."""
-    async def dispatch(self, request: Request, call_next):
         req_id = str(uuid.uuid4())
-        # cast to Optional[str] to satisfy static type checkers
-        request_id_ctx.set(cast(Optional[str], req_id))
-        # attempt to extract job_id from various places: json body, form data, query params, headers
-        job_id = None
-
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        job_id = headers.get("x-job-id") or headers.get("job_id")
+        if not job_id:
+            job_id = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("job_id", [None])[0]
+
+        # request.state is backed by this dict, so bind_job_id() writes are visible here
+        state = request_state(scope)
+        if job_id:
+            state["job_id"] = job_id
+
+        request_token = request_id_ctx.set(req_id)
+        job_token = job_id_ctx.set(job_id)
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        logger.info(f"{scope['method']} {scope['path']} - Request started")
         try:
-            # read and store body to replay later
-            body_bytes = await request.body()
-
-            content_type = request.headers.get('content-type', '')
-
-            # prefer parsing form data (handles multipart/form-data and application/x-www-form-urlencoded)
-            if 'application/x-www-form-urlencoded' in content_type or 'multipart/form-data' in content_type:
-                try:
-                    form = await request.form()
-                    if 'job_id' in form:
-                        job_id = form.get('job_id')
-                except Exception:
-                    # fallback to raw parsing
-                    pass
-            else:
-                if body_bytes:
-                    # try json
-                    try:
-                        body_json = json.loads(body_bytes.decode('utf-8'))
-                        if isinstance(body_json, dict) and "job_id" in body_json:
-                            job_id = body_json.get("job_id")
-                    except Exception:
-                        # not json, could be form-encoded
-                        try:
-                            body_text = body_bytes.decode('utf-8')
-                            # simple parse for key=value pairs
-                            for pair in body_text.split('&'):
-                                if '=' in pair:
-                                    k, v = pair.split('=', 1)
-                                    if k == 'job_id':
-                                        job_id = v
-                                        break
-                        except Exception:
-                            pass
-
-            # check query params
-            if not job_id:
-                job_id = request.query_params.get('job_id')
-
-            # check headers
-            if not job_id:
-                job_id = request.headers.get('x-job-id') or request.headers.get('job_id')
-
-        except Exception as e:
-            logger.debug(f"Error while extracting job_id: {e}")
-
-        # set job_id contextvar (may be None)
-        job_id_ctx.set(cast(Optional[str], job_id))
-
-        logger.info(f"{request.method} {request.url.path} - Request started")
-        try:
-            # replay the body for downstream handlers by creating a new request with the same body
-            # starlette's Request is immutable, but call_next will read the body via receive. We can
-            # override the request._body/stream by creating a receive function. FastAPI/Starlette
-            # caches the body after .body() is called above, so call_next should still see the body.
-            response = await call_next(request)
-            logger.info(f"Request completed with status {response.status_code}")
+            # returns once the full response (including streamed bodies) has been sent
+            await self.app(scope, receive, send_wrapper)
+            logger.info(f"Request completed with status {status_code}")
         except Exception as e:
             logger.exception(f"Unhandled error: {e}")
             raise
         finally:
+            job_id_ctx.set(state.get("job_id"))
             await mongo_handler.flush_request_logs(req_id, {
-                "path": request.url.path,
-                "method": request.method,
-                "status_code": getattr(response, "status_code", 500)
+                "path": scope["path"],
+                "method": scope["method"],
+                "status_code": status_code,
             })
 
-            # clear contextvars to avoid leaking across async tasks
-            try:
-                request_id_ctx.set(None)
-                job_id_ctx.set(None)
-            except Exception:
-                pass
-
-        return response
+            # restore contextvars to avoid leaking across async tasks
+            request_id_ctx.reset(request_token)
+            job_id_ctx.reset(job_token)
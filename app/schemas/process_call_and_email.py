@@ -1,6 +1,8 @@
+import datetime
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, Literal, Union
-from fastapi import Form, File, UploadFile
+from fastapi import Form, File, Request, UploadFile
+from app.utils.request_context import bind_job_id
 
 # ----------------------------------------
 # 📹 Profile
@@ -13,16 +15,23 @@ class ProcessConvocallForm(BaseModel):
     vendor_id: str = "1"
     intent_id: str = "1"
     language_code: Literal["en", "pt","es"] = "en"
+    bypass_cache: bool = False
+    generation_mode: Optional[Literal["translate", "native"]] = None
+    callback_url: Optional[str] = None
 
     @classmethod
-    def as_form(
+    async def as_form(
         cls,
+        request: Request,
         job_id: Optional[str] = Form(None),
         transcript_text: str = Form(...),
         env: str = Form(...),
         vendor_id: str = Form("1"),
         intent_id: str = Form("1"),
         language_code: Literal["en", "pt","es"] = Form("en"),
+        bypass_cache: bool = Form(False),
+        generation_mode: Optional[Literal["translate", "native"]] = Form(None),
+        callback_url: Optional[str] = Form(None),
         jdfile: Union[UploadFile, str, None] = File(None),
     ) -> tuple["ProcessConvocallForm", Optional[UploadFile]]:
         # Handle cases where jdfile is sent as empty str (e.g., in urlencoded requests)
@@ -33,7 +42,10 @@ class ProcessConvocallForm(BaseModel):
         if jdfile and hasattr(jdfile, 'filename'):
             if jdfile.filename == "":
                 jdfile = None
-            
+
+        # the logging middleware does not read bodies; hand it the parsed job_id
+        bind_job_id(request, job_id)
+
         return (
             cls(
                 job_id=job_id,
@@ -42,6 +54,9 @@ class ProcessConvocallForm(BaseModel):
                 vendor_id=vendor_id,
                 intent_id=intent_id,
                 language_code=language_code,
+                bypass_cache=bypass_cache,
+                generation_mode=generation_mode,
+                callback_url=callback_url,
             ),
             jdfile,
         )
@@ -53,16 +68,21 @@ class ProcessConvocallEmailForm(BaseModel):
     vendor_id: str = "1"
     intent_id: str = "1"
     language_code: Literal["en", "pt", "es"] = "en"
+    generation_mode: Optional[Literal["translate", "native"]] = None
+    callback_url: Optional[str] = None
 
     @classmethod
-    def as_form(
+    async def as_form(
         cls,
+        request: Request,
         job_id: Optional[str] = Form(None),
         transcript_text: str = Form(...),
         env: str = Form(...),
         vendor_id: str = Form("1"),
         intent_id: str = Form("1"),
         language_code: Literal["en", "pt", "es"] = Form("en"),
+        generation_mode: Optional[Literal["translate", "native"]] = Form(None),
+        callback_url: Optional[str] = Form(None),
         jdfile: Union[UploadFile, str, None] = File(None),
     ) -> tuple["ProcessConvocallEmailForm", Optional[UploadFile]]:
         # Handle cases where jdfile is sent as empty str (e.g., in urlencoded requests)
@@ -73,7 +93,10 @@ class ProcessConvocallEmailForm(BaseModel):
         if jdfile and hasattr(jdfile, 'filename'):
             if jdfile.filename == "":
                 jdfile = None
-            
+
+        # the logging middleware does not read bodies; hand it the parsed job_id
+        bind_job_id(request, job_id)
+
         return (
             cls(
                 job_id=job_id,
@@ -82,6 +105,55 @@ class ProcessConvocallEmailForm(BaseModel):
                 vendor_id=vendor_id,
                 intent_id=intent_id,
                 language_code=language_code,
+                generation_mode=generation_mode,
+                callback_url=callback_url,
+            ),
+            jdfile,
+        )
+
+class ProcessConvocallLanguagesForm(BaseModel):
+    job_id: Optional[str] = None
+    transcript_text: str
+    env: str
+    vendor_id: str = "1"
+    intent_id: str = "1"
+    language_codes: list[Literal["en", "pt", "es"]]
+    bypass_cache: bool = False
+
+    @classmethod
+    async def as_form(
+        cls,
+        request: Request,
+        job_id: Optional[str] = Form(None),
+        transcript_text: str = Form(...),
+        env: str = Form(...),
+        vendor_id: str = Form("1"),
+        intent_id: str = Form("1"),
+        language_codes: list[Literal["en", "pt", "es"]] = Form(...),
+        bypass_cache: bool = Form(False),
+        jdfile: Union[UploadFile, str, None] = File(None),
+    ) -> tuple["ProcessConvocallLanguagesForm", Optional[UploadFile]]:
+        # Handle cases where jdfile is sent as empty str (e.g., in urlencoded requests)
+        if isinstance(jdfile, str):
+            jdfile = None
+        
+        # Handle empty file uploads (e.g., filename="" in multipart requests)
+        if jdfile and hasattr(jdfile, 'filename'):
+            if jdfile.filename == "":
+                jdfile = None
+
+        # the logging middleware does not read bodies; hand it the parsed job_id
+        bind_job_id(request, job_id)
+
+        return (
+            cls(
+                job_id=job_id,
+                transcript_text=transcript_text,
+                env=env,
+                vendor_id=vendor_id,
+                intent_id=intent_id,
+                language_codes=language_codes,
+                bypass_cache=bypass_cache,
             ),
             jdfile,
         )
@@ -107,4 +179,58 @@ class ProcessConvocallEmailResponse(BaseModel):
     subject: str
     body: str
 
-    model_config = {"populate_by_name": True}
\ No newline at end of file
+    model_config = {"populate_by_name": True}
+
+class ProcessConvocallWithEmailResponse(BaseModel):
+    call_script: ProcessConvocallResponse
+    email: ProcessConvocallEmailResponse
+
+    model_config = {"populate_by_name": True}
+
+
+class BatchJob(BaseModel):
+    type: Literal["convocall", "email"] = "convocall"
+    job_id: Optional[str] = None
+    transcript_text: str
+    env: str
+    vendor_id: str = "1"
+    intent_id: str = "1"
+    language_code: Literal["en", "pt", "es"] = "en"
+    # Name of a JD already known to the extraction service / JD store
+    jdfile_name: Optional[str] = None
+    bypass_cache: bool = False
+    generation_mode: Optional[Literal["translate", "native"]] = None
+    # Queued jobs only: POST the result here when the job finishes
+    callback_url: Optional[str] = None
+
+
+class BatchJobResult(BaseModel):
+    index: int
+    job_id: Optional[str] = None
+    type: Literal["convocall", "email"]
+    success: bool
+    data: Optional[dict] = None
+    error: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    results: list[BatchJobResult]
+
+
+class JobSubmitResponse(BaseModel):
+    id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    job_id: Optional[str] = None
+
+
+class JobStatusResponse(BaseModel):
+    id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    type: Literal["convocall", "email"]
+    job_id: Optional[str] = None
+    attempts: int
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    callback_status: Optional[Literal["pending", "delivered", "failed"]] = None
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
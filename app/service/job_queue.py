@@ -0,0 +1,408 @@
+# app/service/job_queue.py
+
+import asyncio
+import datetime
+import time
+import uuid
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+from app.core.config import job_queue_settings, webhook_settings
+from app.db.mongo_session import ensure_index, get_mongo_db
+from app.schemas.process_call_and_email import BatchJob
+from app.service.process_call_and_email import run_generation_job
+from app.utils.logger_util import logger, job_id_ctx
+from app.utils.webhook import send_webhook, validate_callback_url
+
+COLLECTION_NAME = "generation_jobs"
+
+# Wakes local workers as soon as something is submitted on this process
+_job_submitted = asyncio.Event()
+# Wakes the callback dispatcher as soon as a job with a callback finishes here
+_callback_ready = asyncio.Event()
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def _collection():
+    return get_mongo_db()[COLLECTION_NAME]
+
+
+class JobQueueService:
+    """Mongo-backed queue of generation jobs: submit now, poll for the result later."""
+
+    def __init__(self):
+        pass
+
+    async def submit(self, job: BatchJob) -> dict:
+        """
+        Store a job as queued and return its handle.
+
+        Raises:
+            ValueError: if the job's callback_url is not acceptable
+        """
+        if job.callback_url:
+            validate_callback_url(job.callback_url)
+
+        now = _now()
+        doc = {
+            "_id": uuid.uuid4().hex,
+            "type": job.type,
+            "job_id": job.job_id,
+            "payload": job.model_dump(),
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": job_queue_settings.JOB_MAX_ATTEMPTS,
+            "available_at": now,
+            "lease_expires_at": None,
+            "result": None,
+            "error": None,
+            "callback_status": "pending" if job.callback_url else None,
+            "callback_attempts": 0,
+            # set when the job finishes; the callback dispatcher picks it up from then on
+            "callback_available_at": None,
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None,
+        }
+        await _collection().insert_one(doc)
+        _job_submitted.set()
+        logger.info(f"Queued {job.type} job {doc['_id']}")
+        return {"id": doc["_id"], "status": "queued", "job_id": job.job_id}
+
+    async def get(self, queue_id: str) -> Optional[dict]:
+        doc = await _collection().find_one({"_id": queue_id}, {"payload": 0})
+        if doc is None:
+            return None
+        doc["id"] = doc.pop("_id")
+        return doc
+
+
+async def _claim(worker_id: str) -> Optional[dict]:
+    """Lease the oldest runnable job: queued and due, or running with an expired lease."""
+    now = _now()
+    return await _collection().find_one_and_update(
+        {
+            "$or": [
+                {"status": "queued", "available_at": {"$lte": now}},
+                # a lost lease is re-run only while attempts remain; _fail_exhausted ends the rest
+                {
+                    "status": "running",
+                    "lease_expires_at": {"$lt": now},
+                    "$expr": {"$lt": ["$attempts", "$max_attempts"]},
+                },
+            ]
+        },
+        {
+            "$set": {
+                "status": "running",
+                "worker_id": worker_id,
+                "lease_expires_at": now + datetime.timedelta(seconds=job_queue_settings.JOB_LEASE_SECONDS),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("available_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _fail_exhausted() -> None:
+    """
+    Fail jobs whose lease ran out on their last attempt, e.g. a job that
+    crashes its worker every time; _claim no longer hands them out.
+    """
+    now = _now()
+    exhausted = {
+        "status": "running",
+        "lease_expires_at": {"$lt": now},
+        "$expr": {"$gte": ["$attempts", "$max_attempts"]},
+    }
+    update = {
+        "status": "failed",
+        "error": "Job did not complete within its attempts",
+        "lease_expires_at": None,
+        "finished_at": now,
+        "updated_at": now,
+    }
+    with_callback = await _collection().update_many(
+        {**exhausted, "callback_status": "pending"},
+        {"$set": {**update, "callback_available_at": now}},
+    )
+    without_callback = await _collection().update_many(exhausted, {"$set": update})
+    failed = with_callback.modified_count + without_callback.modified_count
+    if failed:
+        logger.error(f"Failed {failed} jobs whose lease expired on their last attempt")
+    if with_callback.modified_count:
+        _callback_ready.set()
+
+
+async def _renew_lease(queue_id: str, worker_id: str) -> None:
+    """
+    Extend the job's lease every third of JOB_LEASE_SECONDS. Returns once the
+    lease is lost: another worker took the job over, or renewals kept failing
+    (e.g. Mongo unreachable) until the lease ran out.
+    """
+    interval = job_queue_settings.JOB_LEASE_SECONDS / 3
+    expires = time.monotonic() + job_queue_settings.JOB_LEASE_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        now = _now()
+        try:
+            renewed = await _collection().update_one(
+                {"_id": queue_id, "worker_id": worker_id, "status": "running"},
+                {"$set": {
+                    "lease_expires_at": now + datetime.timedelta(seconds=job_queue_settings.JOB_LEASE_SECONDS),
+                    "updated_at": now,
+                }},
+            )
+        except Exception as e:
+            if time.monotonic() >= expires:
+                logger.error(f"Lease on job {queue_id} expired while it could not be renewed: {e}")
+                return
+            logger.warning(f"Could not renew lease on job {queue_id}, retrying: {e}")
+            continue
+
+        if renewed.matched_count == 0:
+            logger.error(f"Lease on job {queue_id} was lost to another worker")
+            return
+        expires = time.monotonic() + job_queue_settings.JOB_LEASE_SECONDS
+
+
+async def _finish(doc: dict, worker_id: str, result: dict) -> None:
+    now = _now()
+    owned = {"_id": doc["_id"], "worker_id": worker_id, "status": "running"}
+
+    if result.get("success"):
+        update = {"status": "succeeded", "result": result["data"], "error": None, "finished_at": now}
+    elif doc["attempts"] < doc["max_attempts"]:
+        delay = job_queue_settings.JOB_RETRY_BACKOFF_SECONDS * (2 ** (doc["attempts"] - 1))
+        update = {
+            "status": "queued",
+            "error": result.get("error"),
+            "available_at": now + datetime.timedelta(seconds=delay),
+        }
+        logger.warning(f"Job {doc['_id']} attempt {doc['attempts']} failed, retrying in {delay}s: {result.get('error')}")
+    else:
+        update = {"status": "failed", "error": result.get("error"), "finished_at": now}
+
+    update.update({"lease_expires_at": None, "updated_at": now})
+    if doc["payload"].get("callback_url") and update["status"] in ("succeeded", "failed"):
+        # written together with the outcome, so a callback goes out only for an owned final update
+        update["callback_available_at"] = now
+    written = await _collection().update_one(owned, {"$set": update})
+    if written.matched_count == 0:
+        # the lease expired and another worker owns the job now; its outcome wins
+        logger.warning(f"Job {doc['_id']} is no longer leased by worker {worker_id}; dropping its result")
+        return
+
+    if "callback_available_at" in update:
+        _callback_ready.set()
+
+
+async def _claim_callback() -> Optional[dict]:
+    """
+    Lease one due callback of a finished job. The lease is a push of
+    callback_available_at past the attempt's timeout, so a dispatcher that
+    dies mid-attempt leaves the callback to be retried elsewhere.
+    """
+    now = _now()
+    lease = datetime.timedelta(seconds=webhook_settings.WEBHOOK_TIMEOUT_SECONDS * 2)
+    return await _collection().find_one_and_update(
+        {
+            "callback_status": "pending",
+            "status": {"$in": ["succeeded", "failed"]},
+            "callback_available_at": {"$lte": now},
+        },
+        {
+            "$set": {"callback_available_at": now + lease, "updated_at": now},
+            "$inc": {"callback_attempts": 1},
+        },
+        sort=[("callback_available_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _deliver_callback(doc: dict) -> None:
+    """One delivery attempt; schedules the next with exponential backoff if it may succeed later."""
+    payload = {
+        "id": doc["_id"],
+        "job_id": doc.get("job_id"),
+        "type": doc["type"],
+        "status": doc["status"],
+        "data": doc.get("result"),
+        "error": doc.get("error"),
+    }
+    attempt = doc["callback_attempts"]
+    outcome = await send_webhook(doc["payload"]["callback_url"], payload, delivery_ref=doc["_id"], attempt=attempt)
+
+    now = _now()
+    if outcome == "delivered":
+        update = {"callback_status": "delivered", "callback_available_at": None}
+    elif outcome == "retry" and attempt < webhook_settings.WEBHOOK_MAX_ATTEMPTS:
+        delay = webhook_settings.WEBHOOK_BACKOFF_SECONDS * (2 ** (attempt - 1))
+        update = {"callback_available_at": now + datetime.timedelta(seconds=delay)}
+    else:
+        logger.error(f"Giving up on callback for job {doc['_id']} after {attempt} attempts")
+        update = {"callback_status": "failed", "callback_available_at": None}
+    update["updated_at"] = now
+    await _collection().update_one({"_id": doc["_id"], "callback_status": "pending"}, {"$set": update})
+
+
+async def run_callback_dispatcher(stop: asyncio.Event) -> None:
+    """
+    Send callbacks of finished jobs, up to WEBHOOK_DISPATCH_CONCURRENCY at a
+    time, apart from the job workers so a dead receiver never blocks a job slot.
+    """
+    slots = asyncio.Semaphore(webhook_settings.WEBHOOK_DISPATCH_CONCURRENCY)
+    in_flight: set[asyncio.Task] = set()
+
+    async def deliver(doc: dict) -> None:
+        try:
+            await _deliver_callback(doc)
+        except Exception as e:
+            # the callback lease runs out and it is picked up again
+            logger.exception(f"Callback dispatch for job {doc['_id']} failed: {e}")
+        finally:
+            slots.release()
+
+    try:
+        while not stop.is_set():
+            await slots.acquire()
+            try:
+                doc = await _claim_callback()
+            except Exception as e:
+                logger.warning(f"Callback dispatcher could not claim a callback: {e}")
+                doc = None
+
+            if doc is None:
+                slots.release()
+                _callback_ready.clear()
+                try:
+                    await asyncio.wait_for(_callback_ready.wait(), timeout=job_queue_settings.JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.ensure_future(deliver(doc))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+    finally:
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+
+async def _process(doc: dict, worker_id: str) -> None:
+    job = BatchJob.model_validate(doc["payload"])
+    job_id_ctx.set(job.job_id)
+    logger.info(f"Worker {worker_id} running job {doc['_id']} (attempt {doc['attempts']})")
+
+    renewer = asyncio.ensure_future(_renew_lease(doc["_id"], worker_id))
+    work = asyncio.ensure_future(run_generation_job(job))
+    try:
+        await asyncio.wait({work, renewer}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        # shutting down: hand the job back without spending an attempt
+        work.cancel()
+        renewer.cancel()
+        try:
+            await _collection().update_one(
+                {"_id": doc["_id"], "worker_id": worker_id, "status": "running"},
+                {"$set": {"status": "queued", "lease_expires_at": None, "updated_at": _now()},
+                 "$inc": {"attempts": -1}},
+            )
+        except Exception as e:
+            logger.warning(f"Could not hand job {doc['_id']} back on shutdown; it will be re-leased: {e}")
+        raise
+
+    if not work.done():
+        # the renewer only finishes on its own when the lease is gone (or it crashed)
+        if not renewer.cancelled() and renewer.exception() is not None:
+            logger.error(f"Lease renewer for job {doc['_id']} crashed: {renewer.exception()!r}")
+        work.cancel()
+        await asyncio.gather(work, return_exceptions=True)
+        logger.error(f"Abandoning job {doc['_id']} after losing its lease")
+        return
+
+    renewer.cancel()
+    await asyncio.gather(renewer, return_exceptions=True)
+    try:
+        result = work.result()
+    except Exception as e:
+        logger.exception(f"Job {doc['_id']} crashed: {e}")
+        result = {"success": False, "error": "An error occurred while processing the job"}
+
+    await _finish(doc, worker_id, result)
+
+
+async def run_worker(stop: asyncio.Event, worker_id: Optional[str] = None) -> None:
+    """Claim and run jobs until stop is set. Jobs left running on shutdown are re-leased elsewhere."""
+    worker_id = worker_id or uuid.uuid4().hex[:12]
+    next_sweep = 0.0
+    while not stop.is_set():
+        if time.monotonic() >= next_sweep:
+            next_sweep = time.monotonic() + job_queue_settings.JOB_POLL_INTERVAL_SECONDS
+            try:
+                await _fail_exhausted()
+            except Exception as e:
+                logger.warning(f"Worker {worker_id} could not sweep exhausted jobs: {e}")
+
+        try:
+            doc = await _claim(worker_id)
+        except Exception as e:
+            logger.warning(f"Worker {worker_id} could not claim a job: {e}")
+            doc = None
+
+        if doc is None:
+            _job_submitted.clear()
+            try:
+                await asyncio.wait_for(_job_submitted.wait(), timeout=job_queue_settings.JOB_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        try:
+            await _process(doc, worker_id)
+        except Exception as e:
+            # e.g. Mongo unavailable while finishing; the lease expires and the job is retried
+            logger.exception(f"Worker {worker_id} failed handling job {doc['_id']}: {e}")
+            await asyncio.sleep(job_queue_settings.JOB_POLL_INTERVAL_SECONDS)
+
+
+def start_workers(stop: asyncio.Event) -> list[asyncio.Task]:
+    """Start JOB_WORKER_CONCURRENCY in-process workers and the callback dispatcher."""
+    workers = [
+        asyncio.ensure_future(run_worker(stop))
+        for _ in range(job_queue_settings.JOB_WORKER_CONCURRENCY)
+    ]
+    workers.append(asyncio.ensure_future(run_callback_dispatcher(stop)))
+    return workers
+
+
+async def stop_workers(stop: asyncio.Event, workers: list[asyncio.Task]) -> None:
+    stop.set()
+    _job_submitted.set()
+    _callback_ready.set()
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def ensure_indexes() -> None:
+    collection = _collection()
+    await collection.create_index([("status", 1), ("available_at", 1)], name="status_available_at")
+    await collection.create_index([("status", 1), ("lease_expires_at", 1)], name="status_lease_expires_at")
+    await collection.create_index(
+        [("callback_status", 1), ("callback_available_at", 1)],
+        name="callback_status_available_at",
+    )
+    await ensure_index(
+        collection,
+        "finished_at",
+        name="finished_at_ttl",
+        expire_after_seconds=job_queue_settings.JOB_RETENTION_SECONDS,
+    )
@@ -1,10 +1,36 @@
 # app/api/routes/v1/process_calls/services.py
 
-from typing import Optional, Literal
-from app.utils.process_call_convo import process_convocall
-from app.utils.process_convo_call_email import process_convocall_email
+import asyncio
+import time
+from typing import AsyncIterator, Optional, Literal
+from app.utils.process_call_convo import process_convocall, process_convocall_languages, stream_convocall
+from app.utils.process_convo_call_email import process_convocall_email, stream_convocall_email
+from app.utils.extract_text_from_file import DocumentExtractionError, extract_jd_text
 
-from app.utils.logger_util import logger
+from pydantic import BaseModel, ValidationError
+
+from app.core.config import admission_settings, generation_settings
+from app.utils.admission import admission_controller, AdmissionRejectedError
+from app.schemas.process_call_and_email import (
+    BatchJob,
+    ProcessConvocallResponse,
+    ProcessConvocallEmailResponse,
+)
+from app.utils.logger_util import logger, job_id_ctx
+
+
+def _stream_error_event(e: Exception, default_message: str) -> dict:
+    """Map a pipeline failure to the terminal "error" event of a stream."""
+    if isinstance(e, DocumentExtractionError):
+        logger.error(f"Extraction error: {e}")
+        detail = "Failed to extract text from the uploaded JD file"
+    elif isinstance(e, ValueError):
+        logger.error(f"Validation error: {e}")
+        detail = str(e)
+    else:
+        logger.error(f"Service error: {e}")
+        detail = default_message
+    return {"event": "error", "data": {"detail": detail}}
 
 
 class ProcessCallService:
@@ -20,7 +46,9 @@ class ProcessCallService:
         env: str,
         vendor_id: str = "1",
         intent_id: str = "1",
-        language_code: Literal["en", "pt","es"] = "en"
+        language_code: Literal["en", "pt","es"] = "en",
+        bypass_cache: bool = False,
+        generation_mode: Optional[Literal["translate", "native"]] = None
     ) -> dict:
         """
         Process a convocall request and generate call flow script.
@@ -32,18 +60,22 @@ class ProcessCallService:
             vendor_id: Vendor identifier
             intent_id: Intent identifier
             language_code: Language code for output
+            bypass_cache: Regenerate even if a cached script exists
+            generation_mode: "native" to generate directly in the target language
         
         Returns:
             Dictionary containing the generated call flow
         """
         try:
-            result = process_convocall(
+            result = await process_convocall(
                 transcript_text=transcript_text,
                 jdfile=jdfile_name,
                 env=env,
                 vendor_id=vendor_id,
                 intent_id=intent_id,
-                language_code=language_code
+                language_code=language_code,
+                bypass_cache=bypass_cache,
+                generation_mode=generation_mode
             )
             
             return {
@@ -51,6 +83,12 @@ class ProcessCallService:
                 "data": result
             }
             
+        except DocumentExtractionError as e:
+            logger.error(f"Extraction error: {e}")
+            return {
+                "success": False,
+                "error": "Failed to extract text from the uploaded JD file"
+            }
         except ValueError as e:
             logger.error(f"Validation error: {e}")
             return {
@@ -64,6 +102,87 @@ class ProcessCallService:
                 "error": "An error occurred while processing the request"
             }
 
+    async def process_convocall_languages_request(
+        self,
+        transcript_text: Optional[str],
+        jdfile_name: Optional[str],
+        env: str,
+        language_codes: list[str],
+        vendor_id: str = "1",
+        intent_id: str = "1",
+        bypass_cache: bool = False
+    ) -> dict:
+        """
+        Process a convocall request for several languages at once.
+
+        Returns:
+            Dictionary whose data maps each language code to its call flow
+        """
+        try:
+            result = await process_convocall_languages(
+                transcript_text=transcript_text,
+                jdfile=jdfile_name,
+                env=env,
+                language_codes=language_codes,
+                vendor_id=vendor_id,
+                intent_id=intent_id,
+                bypass_cache=bypass_cache
+            )
+
+            return {
+                "success": True,
+                "data": result
+            }
+
+        except DocumentExtractionError as e:
+            logger.error(f"Extraction error: {e}")
+            return {
+                "success": False,
+                "error": "Failed to extract text from the uploaded JD file"
+            }
+        except ValueError as e:
+            logger.error(f"Validation error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        except Exception as e:
+            logger.error(f"Service error: {e}")
+            return {
+                "success": False,
+                "error": "An error occurred while processing the request"
+            }
+
+    async def stream_convocall_request(
+        self,
+        transcript_text: Optional[str],
+        jdfile_name: Optional[str],
+        env: str,
+        vendor_id: str = "1",
+        intent_id: str = "1",
+        language_code: Literal["en", "pt","es"] = "en",
+        bypass_cache: bool = False,
+        generation_mode: Optional[Literal["translate", "native"]] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Stream a convocall request as token/status/result events.
+        Failures end the stream with an "error" event instead of raising.
+        """
+        try:
+            async for event in stream_convocall(
+                transcript_text=transcript_text,
+                jdfile=jdfile_name,
+                env=env,
+                vendor_id=vendor_id,
+                intent_id=intent_id,
+                language_code=language_code,
+                bypass_cache=bypass_cache,
+                generation_mode=generation_mode
+            ):
+                yield event
+        except Exception as e:
+            yield _stream_error_event(e, "An error occurred while processing the request")
+
 
 class ProcessEmailService:
     """Service for processing convocall email requests."""
@@ -78,24 +197,32 @@ class ProcessEmailService:
         env: str,
         vendor_id: str = "1",
         intent_id: str = "1",
-        language_code: Literal["en", "pt", "es"] = "en"
+        language_code: Literal["en", "pt", "es"] = "en",
+        generation_mode: Optional[Literal["translate", "native"]] = None
     ) -> dict:
         """
         Process a convocall email request and generate email content.
         """
         try:
-            result = process_convocall_email(
+            result = await process_convocall_email(
                 transcript_text=transcript_text,
                 jdfile=jdfile_name,
                 env=env,
                 vendor_id=vendor_id,
                 intent_id=intent_id,
-                language_code=language_code
+                language_code=language_code,
+                generation_mode=generation_mode
             )
             return {
                 "success": True,
                 "data": result
             }
+        except DocumentExtractionError as e:
+            logger.error(f"Extraction error: {e}")
+            return {
+                "success": False,
+                "error": "Failed to extract text from the uploaded JD file"
+            }
         except ValueError as e:
             logger.error(f"Validation error: {e}")
             return {
@@ -107,4 +234,220 @@ class ProcessEmailService:
             return {
                 "success": False,
                 "error": "An error occurred while processing the email request"
-            }
\ No newline at end of file
+            }
+
+    async def stream_convocall_email_request(
+        self,
+        transcript_text: Optional[str],
+        jdfile_name: Optional[str],
+        env: str,
+        vendor_id: str = "1",
+        intent_id: str = "1",
+        language_code: Literal["en", "pt", "es"] = "en",
+        generation_mode: Optional[Literal["translate", "native"]] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Stream a convocall email request as token/status/result events.
+        Failures end the stream with an "error" event instead of raising.
+        """
+        try:
+            async for event in stream_convocall_email(
+                transcript_text=transcript_text,
+                jdfile=jdfile_name,
+                env=env,
+                vendor_id=vendor_id,
+                intent_id=intent_id,
+                language_code=language_code,
+                generation_mode=generation_mode
+            ):
+                yield event
+        except Exception as e:
+            yield _stream_error_event(e, "An error occurred while processing the email request")
+
+
+class ProcessCallWithEmailService:
+    """Service generating the call script and the email for the same inputs in one go."""
+
+    def __init__(self):
+        pass
+
+    async def process_convocall_with_email_request(
+        self,
+        transcript_text: Optional[str],
+        jdfile_name: Optional[str],
+        env: str,
+        vendor_id: str = "1",
+        intent_id: str = "1",
+        language_code: Literal["en", "pt", "es"] = "en",
+        bypass_cache: bool = False,
+        generation_mode: Optional[Literal["translate", "native"]] = None
+    ) -> dict:
+        """
+        Extract the JD once, then run the call-script and email pipelines concurrently.
+
+        Returns:
+            Dictionary whose data holds "call_script" and "email"
+        """
+        try:
+            jdfile_text = await extract_jd_text(jdfile_name, env)
+
+            call_task = asyncio.ensure_future(process_convocall(
+                transcript_text=transcript_text,
+                jdfile=jdfile_name,
+                env=env,
+                vendor_id=vendor_id,
+                intent_id=intent_id,
+                language_code=language_code,
+                bypass_cache=bypass_cache,
+                generation_mode=generation_mode,
+                jdfile_text=jdfile_text
+            ))
+            email_task = asyncio.ensure_future(process_convocall_email(
+                transcript_text=transcript_text,
+                jdfile=jdfile_name,
+                env=env,
+                vendor_id=vendor_id,
+                intent_id=intent_id,
+                language_code=language_code,
+                generation_mode=generation_mode,
+                jdfile_text=jdfile_text
+            ))
+            try:
+                call_script, email = await asyncio.gather(call_task, email_task)
+            except BaseException:
+                call_task.cancel()
+                email_task.cancel()
+                raise
+
+            return {
+                "success": True,
+                "data": {
+                    "call_script": call_script,
+                    "email": email
+                }
+            }
+
+        except DocumentExtractionError as e:
+            logger.error(f"Extraction error: {e}")
+            return {
+                "success": False,
+                "error": "Failed to extract text from the uploaded JD file"
+            }
+        except ValueError as e:
+            logger.error(f"Validation error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        except Exception as e:
+            logger.error(f"Service error: {e}")
+            return {
+                "success": False,
+                "error": "An error occurred while processing the call script and email request"
+            }
+
+
+async def run_generation_job(job: BatchJob) -> dict:
+    """
+    Run one convocall / email job described by a BatchJob.
+
+    Batch items and queued jobs go through admission control like single
+    requests, charged to the job's vendor; they wait for capacity (up to
+    ADMISSION_PACED_MAX_WAIT_SECONDS) rather than being rejected outright.
+
+    Returns:
+        {"success": True, "data": <validated payload by alias>} or
+        {"success": False, "error": <message>}
+    """
+    if not admission_settings.ADMISSION_ENABLED:
+        return await _run_generation_job(job)
+
+    try:
+        await admission_controller.acquire(job.vendor_id, admission_settings.ADMISSION_PACED_MAX_WAIT_SECONDS)
+    except AdmissionRejectedError as e:
+        logger.warning(f"{job.type} job for vendor {job.vendor_id} not admitted: {e}")
+        return {"success": False, "error": "Server is at capacity, retry later"}
+
+    started = time.monotonic()
+    try:
+        return await _run_generation_job(job)
+    finally:
+        admission_controller.release(time.monotonic() - started)
+
+
+async def _run_generation_job(job: BatchJob) -> dict:
+    response_model: type[BaseModel]
+    if job.type == "email":
+        response_model = ProcessConvocallEmailResponse
+        result = await ProcessEmailService().process_convocall_email_request(
+            transcript_text=job.transcript_text,
+            jdfile_name=job.jdfile_name,
+            env=job.env,
+            vendor_id=job.vendor_id,
+            intent_id=job.intent_id,
+            language_code=job.language_code,
+            generation_mode=job.generation_mode
+        )
+    else:
+        response_model = ProcessConvocallResponse
+        result = await ProcessCallService().process_convocall_request(
+            transcript_text=job.transcript_text,
+            jdfile_name=job.jdfile_name,
+            env=job.env,
+            vendor_id=job.vendor_id,
+            intent_id=job.intent_id,
+            language_code=job.language_code,
+            bypass_cache=job.bypass_cache,
+            generation_mode=job.generation_mode
+        )
+
+    if not result.get("success"):
+        return {"success": False, "error": result.get("error")}
+
+    try:
+        data = response_model.model_validate(result["data"]).model_dump(by_alias=True)
+    except ValidationError as e:
+        logger.error(f"{job.type} job output failed validation: {e}")
+        return {"success": False, "error": "Generated output did not match the response schema"}
+    return {"success": True, "data": data}
+
+
+class BatchProcessService:
+    """Service running many convocall / email jobs under one concurrency limit."""
+
+    def __init__(self):
+        pass
+
+    async def _run_job(self, index: int, job: BatchJob, semaphore: asyncio.Semaphore) -> dict:
+        async with semaphore:
+            # tasks run in a copy of the context, so this only tags this job's logs
+            job_id_ctx.set(job.job_id)
+            result = await run_generation_job(job)
+        return {"index": index, "job_id": job.job_id, "type": job.type, **result}
+
+    def _start(self, jobs: list[BatchJob]) -> list[asyncio.Task]:
+        semaphore = asyncio.Semaphore(generation_settings.BATCH_MAX_CONCURRENCY)
+        return [asyncio.ensure_future(self._run_job(index, job, semaphore)) for index, job in enumerate(jobs)]
+
+    async def process_batch(self, jobs: list[BatchJob]) -> list[dict]:
+        """
+        Run all jobs and return their results in input order.
+        Each result carries success plus either data or error.
+        """
+        tasks = self._start(jobs)
+        try:
+            return list(await asyncio.gather(*tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream_batch(self, jobs: list[BatchJob]) -> AsyncIterator[dict]:
+        """Yield job results as they complete; each carries its input index."""
+        tasks = self._start(jobs)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # client went away or the stream was closed early
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,137 @@
+# app/utils/admission.py
+
+import asyncio
+import math
+import time
+
+from app.core.config import admission_settings, api_keys_settings
+from app.utils.metrics import admission_decisions, admission_in_flight
+from app.utils.ttl_cache import TTLCache
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request is shed; retry_after is a hint in seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Request rejected by admission control ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> float:
+        """Take a token; returns 0 on success, else seconds until one is available."""
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return (1 - self.tokens) / self.rate
+
+    def refund(self) -> None:
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class AdmissionController:
+    """
+    Per-worker admission control for generation requests.
+
+    A request is admitted only if the estimated wait behind the requests
+    already in flight is within ADMISSION_MAX_WAIT_SECONDS, the in-flight count
+    is under ADMISSION_MAX_IN_FLIGHT, and both its vendor's bucket and the
+    global bucket have a token. The wait estimate is in-flight requests per LLM
+    slot times an EWMA of recent request durations.
+    Not thread-safe; meant to be used from the event loop only.
+    """
+
+    def __init__(self):
+        self.global_bucket = TokenBucket(
+            admission_settings.ADMISSION_GLOBAL_RATE,
+            admission_settings.ADMISSION_GLOBAL_BURST,
+        )
+        # idle vendors fall out, so the map stays bounded
+        self.vendor_buckets: TTLCache[TokenBucket] = TTLCache(
+            max_entries=admission_settings.ADMISSION_MAX_VENDORS,
+            ttl_seconds=3600,
+        )
+        self.in_flight = 0
+        self.avg_duration = admission_settings.ADMISSION_INITIAL_DURATION_SECONDS
+
+    def _vendor_bucket(self, vendor_id: str) -> TokenBucket:
+        bucket = self.vendor_buckets.get(vendor_id)
+        if bucket is None:
+            bucket = TokenBucket(
+                admission_settings.ADMISSION_VENDOR_RATE,
+                admission_settings.ADMISSION_VENDOR_BURST,
+            )
+        # refresh the TTL on every use
+        self.vendor_buckets.set(vendor_id, bucket)
+        return bucket
+
+    def estimated_wait(self) -> float:
+        slots = max(1, api_keys_settings.OPENAI_MAX_CONCURRENCY)
+        return self.in_flight / slots * self.avg_duration
+
+    def _reject(self, reason: str, retry_after: float) -> AdmissionRejectedError:
+        admission_decisions.labels("rejected", reason).inc()
+        return AdmissionRejectedError(reason, retry_after)
+
+    def check(self, vendor_id: str) -> None:
+        """Admit one request or raise AdmissionRejectedError. Pair with release()."""
+        wait = self.estimated_wait()
+        if self.in_flight >= admission_settings.ADMISSION_MAX_IN_FLIGHT:
+            raise self._reject("queue_full", max(wait, self.avg_duration))
+        if wait > admission_settings.ADMISSION_MAX_WAIT_SECONDS:
+            raise self._reject("wait_too_long", wait - admission_settings.ADMISSION_MAX_WAIT_SECONDS)
+
+        vendor_bucket = self._vendor_bucket(vendor_id)
+        vendor_retry = vendor_bucket.try_take()
+        if vendor_retry:
+            raise self._reject("vendor_rate", vendor_retry)
+        global_retry = self.global_bucket.try_take()
+        if global_retry:
+            vendor_bucket.refund()
+            raise self._reject("global_rate", global_retry)
+
+        self.in_flight += 1
+        admission_in_flight.set(self.in_flight)
+        admission_decisions.labels("admitted", "").inc()
+
+    async def acquire(self, vendor_id: str, max_wait: float) -> None:
+        """
+        check(), but for work that can be paced instead of shed (batch items,
+        queued jobs): rejections are waited out, re-checking at least every
+        second, for up to max_wait seconds. Pair with release().
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            try:
+                self.check(vendor_id)
+                return
+            except AdmissionRejectedError as e:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise
+                await asyncio.sleep(min(e.retry_after, remaining, 1.0))
+
+    def release(self, duration: float) -> None:
+        self.in_flight -= 1
+        admission_in_flight.set(self.in_flight)
+        alpha = admission_settings.ADMISSION_DURATION_EWMA_ALPHA
+        self.avg_duration = (1 - alpha) * self.avg_duration + alpha * duration
+
+
+admission_controller = AdmissionController()
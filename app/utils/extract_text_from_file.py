@@ -1,30 +1,242 @@
-import urllib.request
-import urllib.parse
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+import httpx
+
 from app.utils.logger_util import logger
-from app.core.config import external_service_settings
+from app.utils.ttl_cache import TTLCache
+from app.utils import local_text_extractor
+from app.utils.jd_store import load_cached_text, save_cached_text
+from app.core.config import external_service_settings, resilience_settings, upload_settings
+from app.utils.resilience import CircuitBreaker, CircuitOpenError, StageDeadlineExceeded, with_deadline
+
+
+class DocumentExtractionError(Exception):
+    """Raised when the extraction API cannot return text for a document."""
+
+
+class DocExtractSession:
+    client: Optional[httpx.AsyncClient] = None
+    pool: Optional[ProcessPoolExecutor] = None
+
+doc_extract_session = DocExtractSession()
 
-def extract_text_from_file(file_name: str, env: str, file_type: str = 'jd') -> str:
+doc_extract_breaker = CircuitBreaker(
+    "doc_extract",
+    failure_threshold=resilience_settings.DOC_EXTRACT_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=resilience_settings.DOC_EXTRACT_BREAKER_RESET_SECONDS,
+)
+
+# Extracted text keyed on (reckFname, type, env)
+extraction_cache: TTLCache[str] = TTLCache(
+    max_entries=external_service_settings.DOC_EXTRACT_CACHE_MAX_ENTRIES,
+    ttl_seconds=external_service_settings.DOC_EXTRACT_CACHE_TTL_SECONDS,
+)
+
+
+def get_doc_extract_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive client for the extraction API."""
+    if doc_extract_session.client is None:
+        doc_extract_session.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=external_service_settings.DOC_EXTRACT_MAX_CONNECTIONS,
+                max_keepalive_connections=external_service_settings.DOC_EXTRACT_MAX_CONNECTIONS,
+            ),
+            timeout=external_service_settings.DOC_EXTRACT_TIMEOUT_SECONDS,
+        )
+    return doc_extract_session.client
+
+
+def get_local_extract_pool() -> ProcessPoolExecutor:
     """
-    Extract text from a document using external API.
+    Return the process pool used for local parsing, creating it on first use.
+
+    Workers come from a forkserver rather than fork(): forking this process
+    would copy locks held by motor and to_thread threads into the child.
     """
-    base_url = external_service_settings.DOC_EXTRACT_API_URL
+    if doc_extract_session.pool is None:
+        doc_extract_session.pool = ProcessPoolExecutor(
+            max_workers=external_service_settings.DOC_EXTRACT_LOCAL_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+    return doc_extract_session.pool
+
+
+def _recycle_local_extract_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Kill a pool whose worker is stuck on a runaway parse; the next call starts
+    a fresh one. Other parses running in it fail and fall back to the API.
+    """
+    if doc_extract_session.pool is pool:
+        doc_extract_session.pool = None
+    # ProcessPoolExecutor has no public way to stop a running task
+    for process in list((pool._processes or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
 
-    params = {
-        'reckFname': file_name,
-        'type': file_type,
-        'env': env
-    }
+async def close_doc_extract_client() -> None:
+    if doc_extract_session.client is not None:
+        await doc_extract_session.client.aclose()
+        doc_extract_session.client = None
+    if doc_extract_session.pool is not None:
+        doc_extract_session.pool.shutdown(wait=False, cancel_futures=True)
+        doc_extract_session.pool = None
 
-    api_url = f"{base_url}?{urllib.parse.urlencode(params)}"
-    content = ''
 
+async def _extract_locally(file_name: str) -> Optional[str]:
+    """
+    Parse a stored upload in the process pool.
+    Returns None when the file is not available locally or not handled by the local engine.
+    """
+    if not external_service_settings.DOC_EXTRACT_LOCAL_ENABLED:
+        return None
+    if not local_text_extractor.supports(file_name):
+        return None
+
+    file_path = os.path.join(upload_settings.JD_STORE_DIR, os.path.basename(file_name))
+    if not os.path.exists(file_path):
+        return None
+
+    loop = asyncio.get_running_loop()
+    pool = get_local_extract_pool()
     try:
-        with urllib.request.urlopen(api_url) as response:
-            content_bytes = response.read()
-            content = content_bytes.decode('utf-8', errors='replace').strip()
-        logger.info(f"Successfully extracted text from {file_name}")
+        content = await asyncio.wait_for(
+            loop.run_in_executor(pool, local_text_extractor.extract_local_text, file_path),
+            timeout=external_service_settings.DOC_EXTRACT_LOCAL_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"Local extraction timed out for {file_name}, recycling the pool and falling back to API")
+        _recycle_local_extract_pool(pool)
+        return None
+    except BrokenProcessPool as e:
+        # a worker died (e.g. killed for memory); the pool refuses all further work
+        logger.warning(f"Local extraction pool broke on {file_name}, recycling it and falling back to API: {e!r}")
+        _recycle_local_extract_pool(pool)
+        return None
     except Exception as e:
-        logger.error(f"Failed to fetch from {api_url}: {e}")
-        content = ''
+        logger.warning(f"Local extraction failed for {file_name}, falling back to API: {e!r}")
+        return None
 
+    if not content:
+        logger.info(f"Local extraction found no text in {file_name}, falling back to API")
+        return None
     return content
+
+
+async def _fetch_text(params: dict) -> str:
+    client = get_doc_extract_client()
+    base_url = external_service_settings.DOC_EXTRACT_API_URL
+    attempts = external_service_settings.DOC_EXTRACT_MAX_RETRIES + 1
+    last_error: Optional[Exception] = None
+
+    for attempt in range(1, attempts + 1):
+        try:
+            response = await asyncio.wait_for(
+                client.get(base_url, params=params),
+                timeout=external_service_settings.DOC_EXTRACT_TIMEOUT_SECONDS,
+            )
+            if response.status_code >= 500:
+                raise httpx.HTTPStatusError(
+                    f"Server error {response.status_code}", request=response.request, response=response
+                )
+            # 4xx will not get better on retry
+            response.raise_for_status()
+            return response.content.decode('utf-8', errors='replace').strip()
+        except httpx.HTTPStatusError as e:
+            last_error = e
+            if e.response.status_code < 500:
+                break
+        except (httpx.TransportError, asyncio.TimeoutError) as e:
+            last_error = e
+
+        if attempt < attempts:
+            delay = external_service_settings.DOC_EXTRACT_BACKOFF_SECONDS * (2 ** (attempt - 1))
+            logger.warning(f"Extraction attempt {attempt} for {params['reckFname']} failed: {last_error!r}; retrying in {delay}s")
+            await asyncio.sleep(delay)
+
+    raise DocumentExtractionError(f"Failed to extract text from {params['reckFname']}: {last_error!r}") from last_error
+
+
+async def _fetch_remote_text(params: dict) -> str:
+    """_fetch_text behind the extraction circuit breaker and the stage deadline (which spans retries)."""
+    try:
+        doc_extract_breaker.allow()
+    except CircuitOpenError as e:
+        raise DocumentExtractionError(str(e))
+
+    try:
+        content = await with_deadline(
+            _fetch_text(params),
+            resilience_settings.DOC_EXTRACT_DEADLINE_SECONDS,
+            "Document extraction",
+        )
+    except StageDeadlineExceeded as e:
+        doc_extract_breaker.record_failure()
+        raise DocumentExtractionError(f"Failed to extract text from {params['reckFname']}: {e}")
+    except DocumentExtractionError as e:
+        cause = e.__cause__
+        if isinstance(cause, httpx.HTTPStatusError) and cause.response.status_code < 500:
+            # the API answered; this document is the problem, not the upstream
+            doc_extract_breaker.release_probe()
+        else:
+            doc_extract_breaker.record_failure()
+        raise
+    except BaseException:
+        doc_extract_breaker.release_probe()
+        raise
+
+    doc_extract_breaker.record_success()
+    return content
+
+
+async def extract_text_from_file(file_name: str, env: str, file_type: str = 'jd') -> str:
+    """
+    Extract text from a document.
+
+    Stored .txt/.docx/text PDFs are parsed locally in a process pool; other
+    formats (or files the local engine cannot read) go to the external API.
+
+    Results are cached per (reckFname, type, env) in memory and, for
+    content-addressed uploads, on disk against the file digest. Raises
+    DocumentExtractionError when the API keeps failing or returns no text.
+    """
+    cache_key = (file_name, file_type, env)
+    cached = extraction_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Extraction cache hit for {file_name}")
+        return cached
+
+    cached = await load_cached_text(file_name, file_type)
+    if cached is not None:
+        logger.info(f"JD store text hit for {file_name}")
+        extraction_cache.set(cache_key, cached)
+        return cached
+
+    content = await _extract_locally(file_name)
+    if content is None:
+        params = {
+            'reckFname': file_name,
+            'type': file_type,
+            'env': env
+        }
+
+        content = await _fetch_remote_text(params)
+        if not content:
+            raise DocumentExtractionError(f"Extraction API returned no text for {file_name}")
+
+    extraction_cache.set(cache_key, content)
+    await save_cached_text(file_name, content, file_type)
+    logger.info(f"Successfully extracted text from {file_name}")
+    return content
+
+
+async def extract_jd_text(jdfile: Optional[str], env: str) -> str:
+    """Extract the JD text for a stored upload name, or '' when no file was sent."""
+    if jdfile and len(jdfile) > 4:
+        return await extract_text_from_file(jdfile, env, 'jd')
+    return ''
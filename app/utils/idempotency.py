@@ -0,0 +1,140 @@
+# app/utils/idempotency.py
+
+import asyncio
+import datetime
+import hashlib
+import json
+from typing import Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import idempotency_settings
+from app.db.mongo_session import ensure_index, get_mongo_db
+from app.utils.logger_util import logger
+
+COLLECTION_NAME = "idempotency_keys"
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyMismatchError(Exception):
+    """The key was already used for a request with different inputs."""
+
+
+class IdempotencyInProgressError(Exception):
+    """The original request for this key is still running after the wait timeout."""
+
+
+def _collection():
+    return get_mongo_db()[COLLECTION_NAME]
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def fingerprint(scope: str, payload: dict) -> str:
+    """Hash of the request inputs, so a reused key with a different body is rejected."""
+    raw = json.dumps({"scope": scope, "payload": payload}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def claim(scope: str, key: str, request_fingerprint: str, owner: str) -> Optional[dict]:
+    """
+    Claim an Idempotency-Key for this request; owner is a token unique to the
+    caller, passed again to complete() and release().
+
+    Returns None when the caller now owns the key and must run the request,
+    then call complete() or release(). Returns the stored record
+    ({"status_code", "body"}) when the request already completed. While the
+    original request is in progress this polls for up to
+    IDEMPOTENCY_WAIT_SECONDS; an owner whose lease expired (crashed worker) is
+    taken over.
+
+    Raises:
+        IdempotencyKeyMismatchError: key reused with different inputs
+        IdempotencyInProgressError: still running after the wait timeout
+    """
+    doc_id = f"{scope}:{key}"
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + idempotency_settings.IDEMPOTENCY_WAIT_SECONDS
+
+    while True:
+        now = _now()
+        lease_until = now + datetime.timedelta(seconds=idempotency_settings.IDEMPOTENCY_LEASE_SECONDS)
+        try:
+            await _collection().insert_one({
+                "_id": doc_id,
+                "fingerprint": request_fingerprint,
+                "status": "in_progress",
+                "owner": owner,
+                "locked_until": lease_until,
+                "created_at": now,
+            })
+            return None
+        except DuplicateKeyError:
+            pass
+
+        doc = await _collection().find_one({"_id": doc_id})
+        if doc is None:
+            # released between our insert and read; try to claim again
+            continue
+        if doc["fingerprint"] != request_fingerprint:
+            raise IdempotencyKeyMismatchError(
+                "Idempotency-Key was already used with a different request"
+            )
+        if doc["status"] == "completed":
+            logger.info(f"Replaying stored response for idempotency key {doc_id}")
+            return {"status_code": doc["status_code"], "body": doc["body"]}
+
+        if doc["locked_until"] < now:
+            taken = await _collection().find_one_and_update(
+                {"_id": doc_id, "status": "in_progress", "locked_until": doc["locked_until"]},
+                {"$set": {"owner": owner, "locked_until": lease_until}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if taken is not None:
+                logger.warning(f"Took over idempotency key {doc_id} from an expired owner")
+                return None
+
+        if loop.time() >= deadline:
+            raise IdempotencyInProgressError(
+                "A request with this Idempotency-Key is still in progress"
+            )
+        await asyncio.sleep(idempotency_settings.IDEMPOTENCY_POLL_INTERVAL_SECONDS)
+
+
+async def complete(scope: str, key: str, owner: str, status_code: int, body) -> bool:
+    """
+    Store the response so retries with the same key replay it.
+
+    Returns False, storing nothing, when owner no longer holds the key (its
+    lease expired and another request took it over); that request's outcome wins.
+    """
+    stored = await _collection().update_one(
+        {"_id": f"{scope}:{key}", "status": "in_progress", "owner": owner},
+        {
+            "$set": {"status": "completed", "status_code": status_code, "body": body, "completed_at": _now()},
+            "$unset": {"locked_until": "", "owner": ""},
+        },
+    )
+    if stored.matched_count == 0:
+        logger.warning(f"Idempotency key {scope}:{key} is no longer held by this request; response not stored")
+        return False
+    return True
+
+
+async def release(scope: str, key: str, owner: str) -> None:
+    """Forget a key whose request failed, so a retry runs it again (only while owner still holds it)."""
+    await _collection().delete_one({"_id": f"{scope}:{key}", "status": "in_progress", "owner": owner})
+
+
+async def ensure_indexes() -> None:
+    """Create the TTL index that expires stored keys."""
+    await ensure_index(
+        _collection(),
+        "created_at",
+        name="created_at_ttl",
+        expire_after_seconds=idempotency_settings.IDEMPOTENCY_TTL_SECONDS,
+    )
@@ -0,0 +1,227 @@
+# app/utils/jd_store.py
+
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import BinaryIO, Optional
+
+from fastapi import UploadFile
+
+from app.core.config import upload_settings
+from app.utils.logger_util import logger
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+_TEXT_DIR = "text"
+
+
+def _store_dir() -> str:
+    return upload_settings.JD_STORE_DIR
+
+
+def _text_dir() -> str:
+    return os.path.join(_store_dir(), _TEXT_DIR)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            buffer.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _touch(path: str) -> None:
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def _evict(directory: str, max_bytes: int) -> None:
+    """Delete least recently used files until the directory fits in max_bytes."""
+    entries = []
+    total = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.is_file() or entry.name.startswith(".tmp-"):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    if total <= max_bytes:
+        return
+
+    entries.sort()
+    # never evict the newest file, it belongs to the request that triggered the write
+    for _, size, path in entries[:-1]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        logger.info(f"Evicted {os.path.basename(path)} from JD store")
+        if total <= max_bytes:
+            break
+
+
+def _digest_of(file_name: str) -> Optional[str]:
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    return stem if _DIGEST_RE.match(stem) else None
+
+
+def stored_file_name(digest: str, original_filename: str) -> str:
+    """Name a stored upload by its SHA-256 digest, keeping the original extension."""
+    file_extension = os.path.splitext(original_filename)[1].lower()
+    return f"{digest}{file_extension}"
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES."""
+
+
+def _open_temp_upload() -> tuple[str, BinaryIO]:
+    os.makedirs(_store_dir(), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=_store_dir(), prefix=".tmp-")
+    return tmp_path, os.fdopen(fd, "wb")
+
+
+def _discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _commit_upload(tmp_path: str, file_name: str) -> None:
+    # always keep the file, even when its text is cached: the two are evicted
+    # independently, and a later text-cache miss falls back to reckFname
+    file_path = os.path.join(_store_dir(), file_name)
+    if os.path.exists(file_path):
+        _discard(tmp_path)
+        _touch(file_path)
+        logger.info(f"JD file already stored as: {file_name}")
+        return
+
+    os.replace(tmp_path, file_path)
+    _evict(_store_dir(), upload_settings.JD_STORE_MAX_BYTES)
+    logger.info(f"Uploaded JD file saved as: {file_name}")
+
+
+async def save_upload(upload: UploadFile) -> str:
+    """
+    Stream an upload to the store in fixed-size chunks, hashing as it goes,
+    and keep it under its content digest. The request body itself is capped
+    earlier by BodyLimitMiddleware; this bounds the file part.
+
+    Args:
+        upload: Uploaded file (only the extension of its name is kept)
+
+    Returns:
+        Stored file name, e.g. "<sha256>.pdf"
+
+    Raises:
+        UploadTooLargeError: if the upload is larger than MAX_UPLOAD_BYTES
+    """
+    max_bytes = upload_settings.MAX_UPLOAD_BYTES
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+
+    hasher = hashlib.sha256()
+    total = 0
+    tmp_path, buffer = await asyncio.to_thread(_open_temp_upload)
+    try:
+        while chunk := await upload.read(upload_settings.UPLOAD_CHUNK_SIZE):
+            total += len(chunk)
+            if total > max_bytes:
+                raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+            hasher.update(chunk)
+            await asyncio.to_thread(buffer.write, chunk)
+        await asyncio.to_thread(buffer.close)
+    except BaseException:
+        await asyncio.to_thread(buffer.close)
+        await asyncio.to_thread(_discard, tmp_path)
+        raise
+
+    file_name = stored_file_name(hasher.hexdigest(), upload.filename or "")
+    await asyncio.to_thread(_commit_upload, tmp_path, file_name)
+    return file_name
+
+
+def _remove_stale_temp_files(max_age_seconds: float) -> int:
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for directory in (_store_dir(), _text_dir()):
+        try:
+            with os.scandir(directory) as it:
+                stale = [
+                    entry.path for entry in it
+                    if entry.name.startswith(".tmp-") and entry.is_file() and entry.stat().st_mtime < cutoff
+                ]
+        except FileNotFoundError:
+            continue
+        for path in stale:
+            _discard(path)
+            removed += 1
+    return removed
+
+
+async def cleanup_temp_files() -> None:
+    """
+    Remove .tmp- files left behind by writes that crashed mid-way. Only files
+    older than JD_STORE_TEMP_MAX_AGE_SECONDS go, so in-flight uploads of other
+    workers sharing the store are left alone.
+    """
+    removed = await asyncio.to_thread(_remove_stale_temp_files, upload_settings.JD_STORE_TEMP_MAX_AGE_SECONDS)
+    if removed:
+        logger.info(f"Removed {removed} stale temp files from JD store")
+
+
+def _text_path(file_name: str, file_type: str) -> Optional[str]:
+    digest = _digest_of(file_name)
+    if digest is None:
+        return None
+    return os.path.join(_text_dir(), f"{digest}.{file_type}.txt")
+
+
+def _load_text(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None
+    _touch(path)
+    return text
+
+
+def _save_text(path: str, text: str) -> None:
+    _write_atomic(path, text.encode("utf-8"))
+    _evict(_text_dir(), upload_settings.JD_TEXT_CACHE_MAX_BYTES)
+
+
+async def load_cached_text(file_name: str, file_type: str = 'jd') -> Optional[str]:
+    """Return previously extracted text for a content-addressed upload, if any."""
+    path = _text_path(file_name, file_type)
+    if path is None:
+        return None
+    return await asyncio.to_thread(_load_text, path)
+
+
+async def save_cached_text(file_name: str, text: str, file_type: str = 'jd') -> None:
+    """Persist extracted text against the upload digest (no-op for other names)."""
+    path = _text_path(file_name, file_type)
+    if path is None:
+        return
+    try:
+        await asyncio.to_thread(_save_text, path, text)
+    except OSError as e:
+        logger.warning(f"Failed to cache extracted text for {file_name}: {e}")
@@ -3,3 +3,20 @@ LANGUAGE_MAP = {
     "pt": "Portuguese",
     "es": "Spanish"   
 }
+
+
+# Extra instructions appended to the English prompts when a script is generated
+# directly in the target language ("native" generation mode) instead of being
+# generated in English and translated afterwards.
+NATIVE_GENERATION_INSTRUCTIONS = {
+    "pt": """
+            Write every value of the JSON in Brazilian Portuguese (português do Brasil), with a natural, friendly recruiter tone.
+            Keep all JSON keys exactly as given in English. Keep placeholders such as [Candidate's Name], [Your Name] or {{Candidate_Name}} and SSML tags such as <break time="1s"/> unchanged.
+            Speak numbers as Portuguese words (eg: 123 as um dois três) instead of English words.
+    """,
+    "es": """
+            Write every value of the JSON in neutral Latin American Spanish (español), with a natural, friendly recruiter tone.
+            Keep all JSON keys exactly as given in English. Keep placeholders such as [Candidate's Name], [Your Name] or {{Candidate_Name}} and SSML tags such as <break time="1s"/> unchanged.
+            Speak numbers as Spanish words (eg: 123 as uno dos tres) instead of English words.
+    """,
+}
@@ -0,0 +1,208 @@
+# app/utils/llm_providers.py
+
+import asyncio
+import json
+import random
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.core.config import api_keys_settings, llm_routing_settings, resilience_settings
+from app.utils import openai_client
+from app.utils.resilience import CircuitBreaker, LatencyTracker, with_deadline
+
+
+class LLMProvider(ABC):
+    """A chat-completion backend. Models are chosen per call by the router."""
+
+    name: str = ""
+
+    @abstractmethod
+    async def complete(self, messages: list[dict], model: str, latency: Optional[LatencyTracker] = None) -> str:
+        """Return the content of one completion; latency is this target and task's window, for providers that hedge."""
+
+    @abstractmethod
+    def stream(self, messages: list[dict], model: str) -> AsyncIterator[str]:
+        """Yield content deltas of one streamed completion."""
+
+    async def close(self) -> None:
+        return None
+
+
+class OpenAIProvider(LLMProvider):
+    """The shared OpenAI client from openai_client, with its deadline, hedging and breaker."""
+
+    name = "openai"
+
+    async def complete(self, messages: list[dict], model: str, latency: Optional[LatencyTracker] = None) -> str:
+        return await openai_client.create_chat_completion(messages, model=model, latency=latency)
+
+    def stream(self, messages: list[dict], model: str) -> AsyncIterator[str]:
+        return openai_client.stream_chat_completion(messages, model=model)
+
+    async def close(self) -> None:
+        await openai_client.close_openai_client()
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Any other OpenAI-compatible endpoint (a second account, Azure, a gateway,
+    a self-hosted model server) with its own client, concurrency cap and breaker.
+    """
+
+    def __init__(self, name: str, base_url: str, api_key: str = "", max_concurrency: int = 16):
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.client: Optional[AsyncOpenAI] = None
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.breaker = CircuitBreaker(
+            f"llm:{name}",
+            failure_threshold=resilience_settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            reset_seconds=resilience_settings.LLM_BREAKER_RESET_SECONDS,
+        )
+
+    def _client(self) -> AsyncOpenAI:
+        if self.client is None:
+            self.client = AsyncOpenAI(
+                api_key=self.api_key or "unused",
+                base_url=self.base_url,
+                http_client=httpx.AsyncClient(timeout=api_keys_settings.OPENAI_TIMEOUT_SECONDS),
+            )
+        return self.client
+
+    async def complete(self, messages: list[dict], model: str, latency: Optional[LatencyTracker] = None) -> str:
+        self.breaker.allow()
+        try:
+            async with self.semaphore:
+                response = await with_deadline(
+                    self._client().chat.completions.create(model=model, messages=messages),  # type: ignore[arg-type]
+                    resilience_settings.LLM_DEADLINE_SECONDS,
+                    f"{self.name} completion",
+                )
+        except Exception as e:
+            if openai_client.is_upstream_failure(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.release_probe()
+            raise
+        except BaseException:
+            self.breaker.release_probe()
+            raise
+        self.breaker.record_success()
+        return response.choices[0].message.content or ""
+
+    async def stream(self, messages: list[dict], model: str) -> AsyncIterator[str]:
+        async with self.semaphore:
+            # after the slot is held, as in openai_client.stream_chat_completion
+            self.breaker.allow()
+            try:
+                stream = await with_deadline(
+                    self._client().chat.completions.create(model=model, messages=messages, stream=True),  # type: ignore[arg-type]
+                    resilience_settings.LLM_DEADLINE_SECONDS,
+                    f"{self.name} stream start",
+                )
+            except Exception as e:
+                if openai_client.is_upstream_failure(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.release_probe()
+                raise
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+            self.breaker.record_success()
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.close()
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+
+class FakeProviderError(Exception):
+    """Injected failure from FakeProvider."""
+
+
+FAKE_CALL_SCRIPT = {
+    "Prompt": "You are a recruiter calling a candidate.",
+    "Opening Layer": "Hi, this is Alex from Callify.",
+    "Context of the Call": "We are hiring for a backend role.",
+    "Job Overview": "Python, FastAPI, MongoDB.",
+    "Pre-screening Questions": [{"Question": "Years of Python?", "Ideal Answer": "5+"}],
+    "Call Ending Message": "Thanks for your time!",
+}
+FAKE_EMAIL = {"subject": "[Company_Name] - Backend Engineer", "body": "Hi [Candidate_Name], ..."}
+
+
+def fake_answer(messages: list[dict]) -> str:
+    """Canned answer that parses like the real one for the convocall, email and translation prompts."""
+    prompt = messages[-1]["content"] if messages else ""
+    if "Translate the text" in prompt:
+        return prompt.rsplit("<text>", 1)[-1].split("</text>")[0]
+    if "email" in prompt.lower() and "subject" in prompt.lower():
+        return json.dumps(FAKE_EMAIL)
+    return json.dumps(FAKE_CALL_SCRIPT)
+
+
+class FakeProvider(LLMProvider):
+    """
+    Local provider for tests and benchmarks: canned answers, configurable latency
+    and error rate. Only registered when FAKE_LLM_ENABLED is set.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.05, error_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+
+    async def complete(self, messages: list[dict], model: str, latency: Optional[LatencyTracker] = None) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if random.random() < self.error_rate:
+            raise FakeProviderError(f"fake provider failure ({model})")
+        return fake_answer(messages)
+
+    async def stream(self, messages: list[dict], model: str) -> AsyncIterator[str]:
+        content = await self.complete(messages, model)
+        for i in range(0, len(content), 16):
+            yield content[i:i + 16]
+
+
+_providers: dict[str, LLMProvider] = {}
+
+
+def register_provider(provider: LLMProvider) -> None:
+    """Add or replace a provider; routes refer to it as "<name>:<model>"."""
+    _providers[provider.name] = provider
+
+
+def get_provider(name: str) -> LLMProvider:
+    try:
+        return _providers[name]
+    except KeyError:
+        raise ValueError(f"Unknown LLM provider '{name}'")
+
+
+async def close_providers() -> None:
+    for provider in _providers.values():
+        await provider.close()
+
+
+register_provider(OpenAIProvider())
+if llm_routing_settings.FAKE_LLM_ENABLED:
+    register_provider(FakeProvider(
+        latency=llm_routing_settings.FAKE_LLM_LATENCY_SECONDS,
+        error_rate=llm_routing_settings.FAKE_LLM_ERROR_RATE,
+    ))
+for _name, _options in llm_routing_settings.LLM_EXTRA_PROVIDERS.items():
+    register_provider(OpenAICompatibleProvider(_name, **_options))
@@ -0,0 +1,244 @@
+# app/utils/llm_router.py
+
+import random
+import time
+from typing import AsyncIterator, Optional
+
+from pydantic import BaseModel
+
+from app.core.config import api_keys_settings, llm_routing_settings, resilience_settings
+from app.utils.llm_providers import get_provider
+from app.utils.logger_util import logger
+from app.utils.metrics import llm_requests, llm_target_latency
+from app.utils.resilience import LatencyTracker
+
+
+class LLMRoute(BaseModel):
+    """
+    One LLM_ROUTES entry. Every field that is set must match the call;
+    targets are "<provider>:<model>" in order of preference.
+    """
+    task: Optional[str] = None
+    intent_id: Optional[str] = None
+    vendor_id: Optional[str] = None
+    language: Optional[str] = None
+    targets: list[str]
+
+    def matches(self, task: str, intent_id: Optional[str], vendor_id: Optional[str], language: Optional[str]) -> bool:
+        return all(
+            expected is None or expected == actual
+            for expected, actual in (
+                (self.task, task),
+                (self.intent_id, intent_id),
+                (self.vendor_id, vendor_id),
+                (self.language, language),
+            )
+        )
+
+
+def _failure_cost() -> float:
+    """Seconds a failed call is counted as: the deadline it may run into before falling back."""
+    return resilience_settings.LLM_DEADLINE_SECONDS or api_keys_settings.OPENAI_TIMEOUT_SECONDS
+
+
+class TargetStats:
+    """Observed health of one provider:model."""
+    __slots__ = ("latency", "error_rate", "last_sample", "consecutive_failures", "cooldown_until")
+
+    def __init__(self):
+        self.latency = llm_routing_settings.LLM_ROUTER_INITIAL_LATENCY_SECONDS
+        self.error_rate = 0.0
+        self.last_sample = time.monotonic()
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def current_error_rate(self, now: float) -> float:
+        """EWMA error rate, decayed by LLM_ROUTER_ERROR_HALF_LIFE_SECONDS since the last call."""
+        half_life = llm_routing_settings.LLM_ROUTER_ERROR_HALF_LIFE_SECONDS
+        if half_life <= 0:
+            return self.error_rate
+        return self.error_rate * 0.5 ** (max(0.0, now - self.last_sample) / half_life)
+
+    def expected_latency(self, now: float) -> float:
+        """Latency of a call with failures counted at the deadline, so a fast-failing target is not fast."""
+        error_rate = self.current_error_rate(now)
+        return (1 - error_rate) * self.latency + error_rate * _failure_cost()
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until and self.current_error_rate(now) <= llm_routing_settings.LLM_ROUTER_MAX_ERROR_RATE
+
+
+def _split_target(target: str) -> tuple[str, str]:
+    provider, _, model = target.partition(":")
+    return provider, model or api_keys_settings.OPENAI_MODEL
+
+
+class LLMRouter:
+    """
+    Picks provider:model targets for a call and falls back along them.
+
+    The candidates are the targets of the first matching LLM_ROUTES rule (else
+    LLM_DEFAULT_TARGETS), followed by LLM_FALLBACK_TARGETS. They are tried
+    healthy-first, then by expected latency (EWMA latency, with failures counted
+    at the deadline) weighted by configured preference, so a slow or failing
+    target drops behind its fallbacks. Its error rate fades while it is idle and
+    LLM_ROUTER_PROBE_RATE of calls try it first again, so it takes its traffic
+    back once it recovers. Not thread-safe; meant to be used from the event loop only.
+    """
+
+    def __init__(self):
+        self.routes = [LLMRoute.model_validate(route) for route in llm_routing_settings.LLM_ROUTES]
+        self.default_targets = llm_routing_settings.LLM_DEFAULT_TARGETS or [f"openai:{api_keys_settings.OPENAI_MODEL}"]
+        self.stats: dict[str, TargetStats] = {}
+        # per target and task: a long script and a short field translation have nothing in common
+        self.latencies: dict[tuple[str, str], LatencyTracker] = {}
+        self._check_targets()
+
+    def _check_targets(self) -> None:
+        """Log configured targets whose provider is not registered; calls skip them to the next target."""
+        configured = self.default_targets + llm_routing_settings.LLM_FALLBACK_TARGETS
+        for route in self.routes:
+            configured += route.targets
+        for target in dict.fromkeys(configured):
+            try:
+                get_provider(_split_target(target)[0])
+            except ValueError as e:
+                logger.error(f"LLM target {target} is not usable: {e}")
+
+    def targets_for(
+        self,
+        task: str,
+        intent_id: Optional[str] = None,
+        vendor_id: Optional[str] = None,
+        language: Optional[str] = None,
+    ) -> list[str]:
+        """Configured targets for this call, in preference order, fallbacks last."""
+        targets = next(
+            (route.targets for route in self.routes if route.matches(task, intent_id, vendor_id, language)),
+            self.default_targets,
+        )
+        return list(dict.fromkeys(targets + llm_routing_settings.LLM_FALLBACK_TARGETS))
+
+    def route_signature(self, task: str, intent_id: Optional[str] = None, vendor_id: Optional[str] = None, language: Optional[str] = None) -> str:
+        """Stable description of the route, for cache keys (replaces the single model name)."""
+        return ",".join(self.targets_for(task, intent_id, vendor_id, language))
+
+    def _stats(self, target: str) -> TargetStats:
+        if target not in self.stats:
+            self.stats[target] = TargetStats()
+        return self.stats[target]
+
+    def _latency(self, target: str, task: str) -> LatencyTracker:
+        """Recent completion latencies of target for task; drives the provider's hedge delay."""
+        if (target, task) not in self.latencies:
+            self.latencies[(target, task)] = LatencyTracker()
+        return self.latencies[(target, task)]
+
+    def order(self, targets: list[str]) -> list[str]:
+        """
+        Healthy targets first, then by expected latency x (1 + weight x preference
+        position). Now and then a demoted target that is preferred over the
+        winner (and not cooling down) is tried first instead, as a probe.
+        """
+        now = time.monotonic()
+        weight = llm_routing_settings.LLM_ROUTER_PREFERENCE_WEIGHT
+
+        def key(item: tuple[int, str]):
+            position, target = item
+            stats = self._stats(target)
+            return (not stats.healthy(now), stats.expected_latency(now) * (1 + weight * position))
+
+        ordered = [target for _, target in sorted(enumerate(targets), key=key)]
+        if len(ordered) > 1 and random.random() < llm_routing_settings.LLM_ROUTER_PROBE_RATE:
+            demoted = [
+                target for target in targets[:targets.index(ordered[0])]
+                if now >= self._stats(target).cooldown_until
+            ]
+            if demoted:
+                probe = random.choice(demoted)
+                ordered.remove(probe)
+                ordered.insert(0, probe)
+        return ordered
+
+    def _record(self, target: str, ok: bool, latency: float) -> None:
+        stats = self._stats(target)
+        alpha = llm_routing_settings.LLM_ROUTER_EWMA_ALPHA
+        now = time.monotonic()
+        stats.error_rate = (1 - alpha) * stats.current_error_rate(now) + alpha * (0.0 if ok else 1.0)
+        stats.last_sample = now
+        provider, model = _split_target(target)
+        llm_requests.labels(provider, model, "success" if ok else "error").inc()
+        if ok:
+            stats.latency = (1 - alpha) * stats.latency + alpha * latency
+            stats.consecutive_failures = 0
+            llm_target_latency.labels(provider, model).set(stats.latency)
+            return
+
+        stats.consecutive_failures += 1
+        if stats.consecutive_failures >= llm_routing_settings.LLM_ROUTER_COOLDOWN_FAILURES:
+            stats.cooldown_until = time.monotonic() + llm_routing_settings.LLM_ROUTER_COOLDOWN_SECONDS
+            stats.consecutive_failures = 0
+            logger.warning(f"LLM target {target} failing; cooling down for {llm_routing_settings.LLM_ROUTER_COOLDOWN_SECONDS}s")
+
+    async def complete(
+        self,
+        messages: list[dict],
+        task: str,
+        intent_id: Optional[str] = None,
+        vendor_id: Optional[str] = None,
+        language: Optional[str] = None,
+    ) -> str:
+        """Run a completion on the best target, falling back along the chain on errors."""
+        last_error: Optional[Exception] = None
+        for target in self.order(self.targets_for(task, intent_id, vendor_id, language)):
+            provider, model = _split_target(target)
+            started = time.monotonic()
+            try:
+                result = await get_provider(provider).complete(messages, model, latency=self._latency(target, task))
+            except Exception as e:
+                self._record(target, False, time.monotonic() - started)
+                logger.warning(f"LLM target {target} failed for {task}: {e!r}")
+                last_error = e
+                continue
+            self._record(target, True, time.monotonic() - started)
+            return result
+        raise last_error or RuntimeError(f"No LLM targets configured for {task}")
+
+    async def stream(
+        self,
+        messages: list[dict],
+        task: str,
+        intent_id: Optional[str] = None,
+        vendor_id: Optional[str] = None,
+        language: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream from the best target. Falls back only until the first token has
+        been yielded; after that an error propagates, since the client already
+        has part of the answer.
+        """
+        last_error: Optional[Exception] = None
+        for target in self.order(self.targets_for(task, intent_id, vendor_id, language)):
+            provider, model = _split_target(target)
+            started = time.monotonic()
+            streamed = False
+            try:
+                async for token in get_provider(provider).stream(messages, model):
+                    if not streamed:
+                        streamed = True
+                        # time to first token is the latency that matters for streams
+                        self._record(target, True, time.monotonic() - started)
+                    yield token
+                if not streamed:
+                    self._record(target, True, time.monotonic() - started)
+                return
+            except Exception as e:
+                if streamed:
+                    raise
+                self._record(target, False, time.monotonic() - started)
+                logger.warning(f"LLM target {target} failed to stream {task}: {e!r}")
+                last_error = e
+        raise last_error or RuntimeError(f"No LLM targets configured for {task}")
+
+
+llm_router = LLMRouter()
@@ -0,0 +1,85 @@
+# app/utils/local_text_extractor.py
+#
+# Pure parsing helpers run inside the extraction process pool. Keep this module
+# free of app settings/logging imports so worker processes start cheaply.
+
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+TEXT_EXTENSIONS = {".txt", ".md", ".csv"}
+DOCX_EXTENSIONS = {".docx"}
+PDF_EXTENSIONS = {".pdf"}
+
+
+def _pdf_supported() -> bool:
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def supports(file_name: str) -> bool:
+    """Whether the local engine can parse this file type."""
+    ext = os.path.splitext(file_name)[1].lower()
+    if ext in TEXT_EXTENSIONS or ext in DOCX_EXTENSIONS:
+        return True
+    return ext in PDF_EXTENSIONS and _pdf_supported()
+
+
+def _read_text(path: str) -> str:
+    with open(path, "rb") as f:
+        raw = f.read()
+    for encoding in ("utf-8-sig", "cp1252"):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return raw.decode("utf-8", errors="replace")
+
+
+def _read_docx(path: str) -> str:
+    with zipfile.ZipFile(path) as archive:
+        xml_bytes = archive.read("word/document.xml")
+
+    paragraphs = []
+    for paragraph in ET.fromstring(xml_bytes).iter(f"{_W_NS}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_W_NS}t" and node.text:
+                parts.append(node.text)
+            elif node.tag == f"{_W_NS}tab":
+                parts.append("\t")
+            elif node.tag in (f"{_W_NS}br", f"{_W_NS}cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+def _read_pdf(path: str) -> str:
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def extract_local_text(path: str) -> str:
+    """
+    Extract plain text from a local .txt/.docx/.pdf file.
+
+    Returns an empty string when nothing could be read (e.g. a scanned PDF),
+    so the caller can fall back to the remote extraction API.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in TEXT_EXTENSIONS:
+        text = _read_text(path)
+    elif ext in DOCX_EXTENSIONS:
+        text = _read_docx(path)
+    elif ext in PDF_EXTENSIONS:
+        text = _read_pdf(path)
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+    return text.strip()
@@ -1,19 +1,87 @@
+import asyncio
 import logging
 import datetime
 import contextvars
+import os
+import random
+import re
+import time
+import uuid
+from collections import OrderedDict
 from typing import Optional
+from bson import json_util
 from pythonjsonlogger import jsonlogger
-from app.db.mongo_session import get_mongo_db
+from app.core.config import logging_settings
+from app.db.mongo_session import ensure_index, get_mongo_db
+from app.utils.metrics import (
+    log_buffer_bytes,
+    log_buffer_requests,
+    log_docs,
+    log_entries_dropped,
+    log_queue_depth,
+)
 
 # Context variables to hold the request_id and job_id
 request_id_ctx: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
 job_id_ctx: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("job_id", default=None)
 
+class _RequestBuffer:
+    """Log entries collected for one request, with the counters used to cap it."""
+    __slots__ = ("entries", "size", "dropped", "sampled", "started")
+
+    def __init__(self, sampled: bool):
+        self.entries: list = []
+        self.size = 0
+        self.dropped = 0
+        self.sampled = sampled
+        self.started = time.monotonic()
+
 class MongoDBLogHandler(logging.Handler):
-    """Custom log handler that buffers logs per request and writes them to MongoDB at the end."""
+    """
+    Custom log handler that buffers logs per request. At the end of a request the
+    buffer becomes one api_logs document, queued for a background writer that
+    inserts documents in batches.
+
+    Buffers are capped per request (entries and bytes) and across requests;
+    buffers nobody flushed (cancelled requests, background tasks that inherited
+    a request id) are evicted once they are older than LOG_BUFFER_MAX_AGE_SECONDS.
+    """
     def __init__(self):
         super().__init__()
-        self.buffer = {}
+        # insertion order == age order, so eviction only has to look at the front
+        self.buffer: "OrderedDict[str, _RequestBuffer]" = OrderedDict()
+        self.buffer_bytes = 0
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=logging_settings.LOG_QUEUE_MAX_SIZE)
+        self._writer: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def _new_buffer(self, req_id: str) -> _RequestBuffer:
+        self._evict_orphans()
+        # sample whole requests so a kept request still has its full INFO trail
+        sampled = random.random() < logging_settings.LOG_INFO_SAMPLE_RATE
+        buf = self.buffer[req_id] = _RequestBuffer(sampled)
+        return buf
+
+    def _evict_orphans(self) -> None:
+        max_age = logging_settings.LOG_BUFFER_MAX_AGE_SECONDS
+        now = time.monotonic()
+        while self.buffer:
+            req_id, buf = next(iter(self.buffer.items()))
+            if len(self.buffer) < logging_settings.LOG_BUFFER_MAX_REQUESTS and now - buf.started < max_age:
+                break
+            self._pop_buffer(req_id)
+            log_entries_dropped.labels("evicted").inc(len(buf.entries))
+        self._update_buffer_metrics()
+
+    def _pop_buffer(self, req_id: str) -> Optional[_RequestBuffer]:
+        buf = self.buffer.pop(req_id, None)
+        if buf is not None:
+            self.buffer_bytes -= buf.size
+        return buf
+
+    def _update_buffer_metrics(self) -> None:
+        log_buffer_requests.set(len(self.buffer))
+        log_buffer_bytes.set(self.buffer_bytes)
 
     def emit(self, record):
         try:
@@ -21,11 +89,27 @@ class MongoDBLogHandler(logging.Handler):
             if not req_id:
                 return
 
+            buf = self.buffer.get(req_id) or self._new_buffer(req_id)
+            if record.levelno <= logging.INFO and not buf.sampled:
+                log_entries_dropped.labels("sampled").inc()
+                return
+
+            message = record.getMessage()
+            # rough size; the exact BSON size is not worth computing per record
+            entry_size = len(message) + 64
+            if (
+                len(buf.entries) >= logging_settings.LOG_BUFFER_MAX_ENTRIES_PER_REQUEST
+                or buf.size + entry_size > logging_settings.LOG_BUFFER_MAX_BYTES_PER_REQUEST
+            ):
+                buf.dropped += 1
+                log_entries_dropped.labels("capped").inc()
+                return
+
             job_id = job_id_ctx.get()
 
             log_entry = {
                 "level": record.levelname,
-                "message": record.getMessage(),
+                "message": message,
                 "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
             }
 
@@ -33,18 +117,20 @@ class MongoDBLogHandler(logging.Handler):
             if job_id:
                 log_entry["job_id"] = job_id
 
-            if req_id not in self.buffer:
-                self.buffer[req_id] = []
-            self.buffer[req_id].append(log_entry)
+            buf.entries.append(log_entry)
+            buf.size += entry_size
+            self.buffer_bytes += entry_size
+            self._update_buffer_metrics()
         except Exception:
             self.handleError(record)
 
     async def flush_request_logs(self, request_id, request_meta):
-        """Save buffered logs for a specific request to MongoDB."""
-        logs = self.buffer.pop(request_id, [])
-        if logs:
-            db = get_mongo_db()
-            collection = db["api_logs"]
+        """Queue buffered logs for a specific request; never waits on MongoDB."""
+        # emit() runs under the handler lock and may be called from worker threads
+        with self.lock:
+            buf = self._pop_buffer(request_id)
+            self._update_buffer_metrics()
+        if buf and buf.entries:
             # collect job_id from context (may be same across logs but prefer explicit)
             job_id = job_id_ctx.get()
 
@@ -54,10 +140,232 @@ class MongoDBLogHandler(logging.Handler):
                 "path": request_meta.get("path"),
                 "method": request_meta.get("method"),
                 "status_code": request_meta.get("status_code"),
-                "logs": logs,
+                "logs": buf.entries,
                 "created_at": datetime.datetime.utcnow(),
             }
-            await collection.insert_one(doc)
+            if buf.dropped:
+                doc["dropped_logs"] = buf.dropped
+            try:
+                self.queue.put_nowait(doc)
+                log_queue_depth.set(self.queue.qsize())
+            except asyncio.QueueFull:
+                # backpressure: the writer is behind, keep the request fast
+                await asyncio.to_thread(self._spill, [doc])
+
+    @staticmethod
+    def _spill_path() -> str:
+        # one file per process, so workers sharing LOG_SPILL_PATH never append to or replay the same file
+        return f"{logging_settings.LOG_SPILL_PATH}.{os.getpid()}"
+
+    def _spill(self, docs: list) -> None:
+        """
+        Append docs to this process's spill file, or drop them when spilling is
+        disabled or fails. Blocking; call it through asyncio.to_thread.
+        """
+        if logging_settings.LOG_SPILL_PATH:
+            try:
+                lines = []
+                for doc in docs:
+                    try:
+                        lines.append(json_util.dumps(doc) + "\n")
+                    except Exception:
+                        log_docs.labels("dropped").inc()
+                with open(self._spill_path(), "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                log_docs.labels("spilled").inc(len(lines))
+                return
+            except OSError:
+                pass
+        log_docs.labels("dropped").inc(len(docs))
+
+    async def _write(self, docs: list) -> None:
+        by_collection: dict[str, list] = {}
+        for doc in docs:
+            by_collection.setdefault(api_logs_collection_name(doc["created_at"]), []).append(doc)
+
+        for name, group in by_collection.items():
+            if name not in _indexed_collections:
+                await _prepare_collection(name)
+            try:
+                await get_mongo_db()[name].insert_many(group, ordered=False)
+                log_docs.labels("written").inc(len(group))
+            except Exception as e:
+                # unordered insert: some docs may have landed, but we cannot tell which cheaply
+                logger.warning(f"Failed to write {len(group)} {name} documents: {e}")
+                await asyncio.to_thread(self._spill, group)
+
+    @staticmethod
+    def _claim_spill_files() -> list[str]:
+        """
+        Take over spill files left by earlier processes (and the pre-per-process
+        LOG_SPILL_PATH itself). Each is renamed first, which only one of several
+        starting workers can win.
+        """
+        base = logging_settings.LOG_SPILL_PATH
+        directory = os.path.dirname(base) or "."
+        pattern = re.compile(re.escape(os.path.basename(base)) + r"(\.\d+)?")
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+
+        claimed = []
+        for name in names:
+            if not pattern.fullmatch(name):
+                continue
+            path = os.path.join(directory, name)
+            replay_path = f"{path}.replay-{uuid.uuid4().hex[:8]}"
+            try:
+                os.rename(path, replay_path)
+            except FileNotFoundError:
+                continue
+            claimed.append(replay_path)
+        return claimed
+
+    @staticmethod
+    def _read_spill_batch(f) -> tuple[list, int]:
+        """Next LOG_BATCH_SIZE documents from a spill file, and how many unreadable lines were skipped."""
+        batch, skipped = [], 0
+        while len(batch) < logging_settings.LOG_BATCH_SIZE:
+            line = f.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                batch.append(json_util.loads(line))
+            except Exception:
+                # e.g. a line cut short by a crash mid-write
+                skipped += 1
+        return batch, skipped
+
+    async def _replay_spill(self) -> None:
+        """Re-queue documents spilled by previous runs, then delete the spill files."""
+        if not logging_settings.LOG_SPILL_PATH:
+            return
+
+        for replay_path in await asyncio.to_thread(self._claim_spill_files):
+            skipped = 0
+            with open(replay_path, "r", encoding="utf-8", errors="replace") as f:
+                while True:
+                    batch, bad = await asyncio.to_thread(self._read_spill_batch, f)
+                    skipped += bad
+                    if not batch:
+                        break
+                    await self._write(batch)
+            if skipped:
+                log_docs.labels("dropped").inc(skipped)
+                logger.warning(f"Skipped {skipped} unreadable lines replaying {replay_path}")
+            await asyncio.to_thread(os.remove, replay_path)
+
+    async def _run_writer(self) -> None:
+        try:
+            await self._replay_spill()
+        except Exception as e:
+            # a half-replayed file keeps its .replay- name and is left for inspection
+            logger.exception(f"Replaying spilled logs failed: {e}")
+        loop = asyncio.get_running_loop()
+        interval = logging_settings.LOG_FLUSH_INTERVAL_SECONDS
+        while not (self._stopping and self.queue.empty()):
+            try:
+                batch = [await asyncio.wait_for(self.queue.get(), interval)]
+            except asyncio.TimeoutError:
+                continue
+            deadline = loop.time() + interval
+            while len(batch) < logging_settings.LOG_BATCH_SIZE:
+                if self.queue.empty() and self._stopping:
+                    break
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            log_queue_depth.set(self.queue.qsize())
+            try:
+                await self._write(batch)
+            except Exception as e:
+                # keep the writer alive; an unwritable batch is spilled like a failed insert
+                logger.exception(f"Log writer failed on a batch of {len(batch)} documents: {e}")
+                await asyncio.to_thread(self._spill, batch)
+
+    def start_writer(self) -> None:
+        """Start the background batch writer (call from the app lifespan)."""
+        if self._writer is None:
+            self._stopping = False
+            self._writer = asyncio.ensure_future(self._run_writer())
+
+    async def stop_writer(self) -> None:
+        """Let the writer drain everything still queued, then stop it."""
+        if self._writer is None:
+            return
+        # not cancelled: a cancel could land between dequeuing a batch and writing it
+        self._stopping = True
+        try:
+            await self._writer
+        except Exception as e:
+            logger.exception(f"Log writer stopped with an error: {e}")
+        self._writer = None
+        log_queue_depth.set(0)
+
+API_LOGS_COLLECTION = "api_logs"
+
+# collections whose indexes were ensured by this process
+_indexed_collections: set[str] = set()
+
+def api_logs_collection_name(created_at: datetime.datetime) -> str:
+    """api_logs, or api_logs_YYYYMMDD when LOG_DAILY_COLLECTIONS is on."""
+    if logging_settings.LOG_DAILY_COLLECTIONS:
+        return f"{API_LOGS_COLLECTION}_{created_at:%Y%m%d}"
+    return API_LOGS_COLLECTION
+
+async def _ensure_collection_indexes(name: str) -> None:
+    collection = get_mongo_db()[name]
+    await ensure_index(collection, "request_id", name="request_id")
+    await ensure_index(collection, "job_id", name="job_id")
+    await ensure_index(collection, [("path", 1), ("created_at", -1)], name="path_created_at")
+    if logging_settings.LOG_RETENTION_SECONDS > 0:
+        await ensure_index(
+            collection,
+            "created_at",
+            name="created_at_ttl",
+            expire_after_seconds=logging_settings.LOG_RETENTION_SECONDS,
+        )
+    else:
+        await ensure_index(collection, "created_at", name="created_at")
+    _indexed_collections.add(name)
+
+async def _drop_expired_buckets() -> None:
+    """Drop whole daily collections once every document in them is past retention."""
+    if not logging_settings.LOG_DAILY_COLLECTIONS or logging_settings.LOG_RETENTION_SECONDS <= 0:
+        return
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=logging_settings.LOG_RETENTION_SECONDS)
+    # a bucket holds one UTC day, so it is expired once the day after it is older than the cutoff
+    oldest_kept = api_logs_collection_name(cutoff)
+    db = get_mongo_db()
+    prefix = f"{API_LOGS_COLLECTION}_"
+    for name in await db.list_collection_names(filter={"name": {"$regex": f"^{prefix}\\d{{8}}$"}}):
+        if name < oldest_kept:
+            await db.drop_collection(name)
+            _indexed_collections.discard(name)
+            logger.info(f"Dropped expired log collection {name}")
+
+async def _prepare_collection(name: str) -> None:
+    """Ensure indexes on a collection the writer is about to use; a new daily bucket also triggers retention."""
+    try:
+        await _ensure_collection_indexes(name)
+        await _drop_expired_buckets()
+    except Exception as e:
+        # writes still work without indexes; not retried per batch, since a failure
+        # that repeats would cost several round trips on every flush
+        logger.warning(f"Could not prepare log collection {name}: {e}")
+        _indexed_collections.add(name)
+
+async def ensure_log_indexes() -> None:
+    """Create api_logs indexes (today's bucket in daily mode) and drop expired daily buckets."""
+    await _ensure_collection_indexes(api_logs_collection_name(datetime.datetime.utcnow()))
+    await _drop_expired_buckets()
 
 # Configure global logger
 logger = logging.getLogger("app_logger")
@@ -72,7 +380,7 @@ stream_handler.setFormatter(formatter)
 mongo_handler = MongoDBLogHandler()
 
 # expose for middleware
-__all__ = ["logger", "request_id_ctx", "job_id_ctx", "mongo_handler"]
+__all__ = ["logger", "request_id_ctx", "job_id_ctx", "mongo_handler", "ensure_log_indexes"]
 
 logger.addHandler(stream_handler)
 logger.addHandler(mongo_handler)
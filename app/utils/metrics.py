@@ -0,0 +1,92 @@
+# app/utils/metrics.py
+#
+# Application-level Prometheus metrics. They are registered on the default
+# registry, so the instrumentator's /metrics endpoint exports them as well.
+
+from prometheus_client import Counter, Gauge
+
+script_cache_requests = Counter(
+    "callify_script_cache_requests_total",
+    "Generated script cache lookups by tier and result",
+    ["namespace", "tier", "result"],
+)
+
+translation_memo_requests = Counter(
+    "callify_translation_memo_requests_total",
+    "Per-field translation memo lookups by language and result",
+    ["language", "result"],
+)
+
+log_docs = Counter(
+    "callify_api_log_docs_total",
+    "api_logs documents by outcome (written, spilled, dropped)",
+    ["outcome"],
+)
+
+log_queue_depth = Gauge(
+    "callify_api_log_queue_depth",
+    "api_logs documents waiting for the background writer",
+)
+
+log_buffer_requests = Gauge(
+    "callify_log_buffer_requests",
+    "Requests with log entries buffered in the Mongo log handler",
+)
+
+log_buffer_bytes = Gauge(
+    "callify_log_buffer_bytes",
+    "Approximate size of log entries buffered in the Mongo log handler",
+)
+
+log_entries_dropped = Counter(
+    "callify_log_entries_dropped_total",
+    "Request log entries not written to api_logs, by reason (sampled, capped, evicted)",
+    ["reason"],
+)
+
+single_flight_requests = Counter(
+    "callify_single_flight_requests_total",
+    "Generation calls by whether they started the work (leader) or joined an identical in-flight one (coalesced)",
+    ["name", "role"],
+)
+
+admission_decisions = Counter(
+    "callify_admission_decisions_total",
+    "Generation requests admitted or rejected by admission control, by rejection reason",
+    ["decision", "reason"],
+)
+
+admission_in_flight = Gauge(
+    "callify_admission_in_flight",
+    "Generation requests admitted and not yet finished in this worker",
+)
+
+circuit_breaker_state = Gauge(
+    "callify_circuit_breaker_state",
+    "Circuit breaker state per upstream (0 closed, 1 open, 2 half-open)",
+    ["name"],
+)
+
+circuit_breaker_rejections = Counter(
+    "callify_circuit_breaker_rejections_total",
+    "Calls failed fast because the upstream's circuit breaker was open",
+    ["name"],
+)
+
+hedged_requests = Counter(
+    "callify_hedged_requests_total",
+    "Hedged upstream calls: second attempts fired, and how often the second attempt won",
+    ["name", "event"],
+)
+
+llm_requests = Counter(
+    "callify_llm_requests_total",
+    "Routed LLM calls by provider, model and outcome",
+    ["provider", "model", "outcome"],
+)
+
+llm_target_latency = Gauge(
+    "callify_llm_target_latency_seconds",
+    "EWMA latency the LLM router observes per provider and model",
+    ["provider", "model"],
+)
@@ -0,0 +1,179 @@
+# app/utils/openai_client.py
+
+import asyncio
+import time
+from typing import AsyncIterator, Optional
+
+import httpx
+from openai import APIStatusError, AsyncOpenAI
+
+from app.core.config import api_keys_settings, resilience_settings
+from app.utils.resilience import CircuitBreaker, LatencyTracker, hedged, with_deadline
+
+
+class OpenAISession:
+    client: Optional[AsyncOpenAI] = None
+    semaphore: Optional[asyncio.Semaphore] = None
+
+openai_session = OpenAISession()
+
+openai_breaker = CircuitBreaker(
+    "openai",
+    failure_threshold=resilience_settings.LLM_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=resilience_settings.LLM_BREAKER_RESET_SECONDS,
+)
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Return the shared AsyncOpenAI client, creating it on first use.
+    The underlying httpx pool keeps connections alive across requests.
+    """
+    if openai_session.client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=api_keys_settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=api_keys_settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=api_keys_settings.OPENAI_TIMEOUT_SECONDS,
+        )
+        openai_session.client = AsyncOpenAI(
+            api_key=api_keys_settings.OPENAI_API_KEY,
+            base_url=api_keys_settings.OPENAI_BASE_URL,
+            http_client=http_client,
+        )
+    return openai_session.client
+
+
+def get_openai_semaphore() -> asyncio.Semaphore:
+    """Return the semaphore capping in-flight LLM calls for this worker."""
+    if openai_session.semaphore is None:
+        openai_session.semaphore = asyncio.Semaphore(api_keys_settings.OPENAI_MAX_CONCURRENCY)
+    return openai_session.semaphore
+
+
+async def close_openai_client() -> None:
+    if openai_session.client is not None:
+        await openai_session.client.close()
+        openai_session.client = None
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """Errors that say the upstream is unhealthy; a rejected request (4xx other than 429) does not."""
+    if isinstance(error, APIStatusError):
+        return error.status_code >= 500 or error.status_code == 429
+    return True
+
+
+def hedge_delay(latency: Optional[LatencyTracker]) -> Optional[float]:
+    """Seconds after which a slow completion gets a second attempt, None while hedging is off or unlearned."""
+    if not resilience_settings.LLM_HEDGE_ENABLED or latency is None:
+        return None
+    p = latency.quantile(
+        resilience_settings.LLM_HEDGE_QUANTILE,
+        resilience_settings.LLM_HEDGE_MIN_SAMPLES,
+    )
+    if p is None:
+        return None
+    return max(p, resilience_settings.LLM_HEDGE_MIN_DELAY_SECONDS)
+
+
+async def _complete_once(messages: list[dict], model: str, latency: Optional[LatencyTracker]) -> str:
+    client = get_openai_client()
+    async with get_openai_semaphore():
+        started = time.monotonic()
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,  # type: ignore[arg-type]
+        )
+        if latency is not None:
+            latency.observe(time.monotonic() - started)
+    return response.choices[0].message.content or ""
+
+
+async def create_chat_completion(
+    messages: list[dict],
+    model: Optional[str] = None,
+    latency: Optional[LatencyTracker] = None,
+) -> str:
+    """
+    Run a chat completion on the shared client under the concurrency cap.
+
+    The call is bounded by LLM_DEADLINE_SECONDS, hedged with a second attempt
+    once it runs past the p95 of latency (if a concurrency slot is free), and
+    fails fast with CircuitOpenError while the OpenAI breaker is open.
+
+    Args:
+        messages: Chat messages to send
+        model: Model name, defaults to OPENAI_MODEL
+        latency: Recent latencies of this kind of call (the router keeps one per
+            target and task); None disables hedging
+
+    Returns:
+        Content of the first choice (empty string if missing)
+    """
+    model = model or api_keys_settings.OPENAI_MODEL
+    openai_breaker.allow()
+    try:
+        result = await with_deadline(
+            hedged(
+                lambda: _complete_once(messages, model, latency),
+                hedge_delay(latency),
+                "openai",
+                should_hedge=lambda: not get_openai_semaphore().locked(),
+            ),
+            resilience_settings.LLM_DEADLINE_SECONDS,
+            "LLM completion",
+        )
+    except Exception as e:
+        if is_upstream_failure(e):
+            openai_breaker.record_failure()
+        else:
+            openai_breaker.release_probe()
+        raise
+    except BaseException:
+        # cancelled by the caller: no verdict on upstream health
+        openai_breaker.release_probe()
+        raise
+    openai_breaker.record_success()
+    return result
+
+
+async def stream_chat_completion(messages: list[dict], model: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Stream a chat completion, yielding content deltas as they arrive.
+    The concurrency slot is held until the stream is exhausted or closed.
+    Opening the stream goes through the OpenAI breaker and LLM deadline;
+    streams are not hedged, since tokens are already on their way to the client.
+    """
+    client = get_openai_client()
+    async with get_openai_semaphore():
+        # only once a slot is held: a half-open probe taken while waiting for one
+        # would never be released if the stream were cancelled there
+        openai_breaker.allow()
+        try:
+            stream = await with_deadline(
+                client.chat.completions.create(
+                    model=model or api_keys_settings.OPENAI_MODEL,
+                    messages=messages,  # type: ignore[arg-type]
+                    stream=True,
+                ),
+                resilience_settings.LLM_DEADLINE_SECONDS,
+                "LLM stream start",
+            )
+        except Exception as e:
+            if is_upstream_failure(e):
+                openai_breaker.record_failure()
+            else:
+                openai_breaker.release_probe()
+            raise
+        except BaseException:
+            openai_breaker.release_probe()
+            raise
+        openai_breaker.record_success()
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
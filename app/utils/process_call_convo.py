@@ -1,38 +1,47 @@
 # app/api/routes/v1/process_calls/utils.py
 
+import asyncio
+import copy
 import json
-from typing import Optional, Literal
-from openai import OpenAI
+from typing import AsyncIterator, Optional, Literal
 
+from pydantic import ValidationError
 
-from app.core.config import api_keys_settings
-from app.utils.extract_text_from_file import extract_text_from_file
+from app.schemas.process_call_and_email import ProcessConvocallResponse
+from app.utils import script_cache
+from app.utils.extract_text_from_file import extract_jd_text
 from app.utils.language_map import LANGUAGE_MAP
+from app.utils.llm_router import llm_router
+from app.utils.single_flight import SingleFlight
+from app.utils.translation import translate_payload, generation_language, native_generation_instruction
 
 from app.utils.logger_util import logger
 
-# Set OpenAI API key from settings
-client = OpenAI(api_key=api_keys_settings.OPENAI_API_KEY)
+# Bump whenever the prompts below change so cached scripts are not reused
+CONVOCALL_PROMPT_VERSION = "1"
 
+convocall_flight: SingleFlight[dict] = SingleFlight("convocall")
 
 
-def generate_convocall_script(
+def build_convocall_messages(
     transcript_text: str,
     file_text: str,
     vendor_id: str,
-    intent_id: str
-) -> str:
+    intent_id: str,
+    language_code: str = "en"
+) -> list[dict]:
     """
-    Generate a conversational call flow script using GPT-4.
+    Build the chat messages for a conversational call flow script.
     
     Args:
         transcript_text: Transcript or context text
         file_text: Additional file content
         vendor_id: Vendor identifier
         intent_id: Intent identifier
+        language_code: Language to write the values in (native generation mode)
     
     Returns:
-        Generated call flow script as JSON string
+        Messages for the chat completion
     """
     # keep file_text available for prompt construction when needed
 
@@ -167,80 +176,175 @@ def generate_convocall_script(
 
             """
     
-    response = client.chat.completions.create(
-        model=api_keys_settings.OPENAI_MODEL,
-        messages=[
-            {"role": "system", "content": "You have to give a conversation call flow"},
-            {"role": "user", "content": prompt}
-        ]
+    prompt += native_generation_instruction(language_code)
+
+    return [
+        {"role": "system", "content": "You have to give a conversation call flow"},
+        {"role": "user", "content": prompt}
+    ]
+
+async def generate_convocall_script(
+    transcript_text: str,
+    file_text: str,
+    vendor_id: str,
+    intent_id: str,
+    language_code: str = "en"
+) -> str:
+    """
+    Generate a conversational call flow script using GPT-4.
+
+    Returns:
+        Generated call flow script as JSON string
+    """
+    return await llm_router.complete(
+        build_convocall_messages(transcript_text, file_text, vendor_id, intent_id, language_code),
+        task="convocall",
+        intent_id=intent_id,
+        vendor_id=vendor_id,
+        language=language_code,
     )
-    
-    return response.choices[0].message.content or ""
 
-def process_convocall(
+def parse_convocall_script(result: str) -> dict:
+    """Strip code fences/whitespace from a model response and parse the script JSON."""
+    final_response = (
+        result.replace("json", "")
+        .replace("```", "")
+        .replace("\n", "")
+        .replace("\r", "")
+        .replace("\t", "")
+    )
+    return _normalize_pre_screening_sections(json.loads(final_response))
+
+def validate_convocall_script(parsed: dict) -> dict:
+    """
+    Check a parsed script against ProcessConvocallResponse before it is cached
+    or returned, so a malformed model answer is never stored.
+
+    Raises:
+        ValueError: if required sections are missing or mistyped
+    """
+    try:
+        ProcessConvocallResponse.model_validate(parsed)
+    except ValidationError as e:
+        raise ValueError(f"Generated call script did not match the response schema: {e.error_count()} errors") from e
+    return parsed
+
+async def _lookup_script(cache_key: str) -> Optional[dict]:
+    """Cached script for this key, ignoring entries that no longer validate."""
+    parsed = await script_cache.lookup(cache_key)
+    if parsed is None:
+        return None
+    try:
+        return validate_convocall_script(parsed)
+    except ValueError as e:
+        logger.warning(f"Ignoring invalid cached call script: {e}")
+        return None
+
+def convocall_cache_key(
+    transcript_text: Optional[str],
+    jdfile_text: str,
+    vendor_id: str,
+    intent_id: str,
+    script_language: str = "en"
+) -> str:
+    return script_cache.make_key(
+        "convocall",
+        CONVOCALL_PROMPT_VERSION,
+        llm_router.route_signature("convocall", intent_id, vendor_id, script_language),
+        transcript_text,
+        jdfile_text,
+        vendor_id,
+        intent_id,
+        script_language,
+    )
+
+async def get_convocall_script(
+    transcript_text: Optional[str],
+    jdfile_text: str,
+    vendor_id: str,
+    intent_id: str,
+    script_language: str = "en",
+    bypass_cache: bool = False
+) -> dict:
+    """
+    Return the parsed call script for these inputs, from the script cache or the LLM.
+
+    The script is cached on the normalized inputs; bypass_cache skips the
+    lookup and regenerates (the fresh result still refreshes the cache).
+    Concurrent calls with the same inputs are coalesced into one generation.
+    """
+    cache_key = convocall_cache_key(transcript_text, jdfile_text, vendor_id, intent_id, script_language)
+    parsed = None if bypass_cache else await _lookup_script(cache_key)
+    if parsed is not None:
+        logger.info("Using cached call script")
+        return parsed
+
+    async def generate() -> dict:
+        # Generate call script
+        result = await generate_convocall_script(
+            transcript_text or "",
+            jdfile_text,
+            vendor_id,
+            intent_id,
+            script_language
+        )
+
+        parsed = validate_convocall_script(parse_convocall_script(result))
+        await script_cache.store(cache_key, parsed)
+        return parsed
+
+    # identical requests already generating share that LLM call; callers get their own copy
+    return copy.deepcopy(await convocall_flight.do(cache_key, generate))
+
+async def translate_convocall_script(cache_key: str, parsed: dict, language_code: str) -> dict:
+    """
+    Translate a generated script field by field. Identical requests in flight
+    (same script cache key and target language) share one translation pass.
+    """
+    async def translate() -> dict:
+        return await translate_payload(parsed, language_code)
+
+    return copy.deepcopy(await convocall_flight.do(f"{cache_key}:translate:{language_code}", translate))
+
+async def process_convocall(
     transcript_text: Optional[str],
     jdfile: Optional[str],
     env: str,
     vendor_id: str = "1",
     intent_id: str = "1",
-    language_code: Literal["en", "pt", "es"] = "en"
+    language_code: Literal["en", "pt", "es"] = "en",
+    bypass_cache: bool = False,
+    generation_mode: Optional[Literal["translate", "native"]] = None,
+    jdfile_text: Optional[str] = None
 ) -> dict:
     """
     Main function to process convo call and generate script.
+
+    In "native" generation_mode non-English scripts are written directly in the
+    target language instead of being generated in English and translated.
+    Pass jdfile_text when the JD has already been extracted for this request.
     """
     try:
-        # Extract text from file if provided
-        jdfile_text = ''
-        if jdfile and len(jdfile) > 4:
-            jdfile_text = extract_text_from_file(jdfile, env, 'jd')
+        # Extract text from file if provided (unless the caller already did)
+        if jdfile_text is None:
+            jdfile_text = await extract_jd_text(jdfile, env)
 
-        # Generate call script
-        result = generate_convocall_script(
-            transcript_text or "",
+        script_language = generation_language(language_code, generation_mode)
+        parsed = await get_convocall_script(
+            transcript_text,
             jdfile_text,
             vendor_id,
-            intent_id
-        )
-
-        # Clean the response
-        final_response = (
-            result.replace("json", "")
-            .replace("```", "")
-            .replace("\n", "")
-            .replace("\r", "")
-            .replace("\t", "")
+            intent_id,
+            script_language,
+            bypass_cache
         )
 
-        # Parse JSON
-        parsed = _normalize_pre_screening_sections(json.loads(final_response))
-        cleaned = json.dumps(parsed, separators=(',', ':'))
-
-        # Unified translation logic
-        if language_code != 'en' and language_code in LANGUAGE_MAP:
-            language_name = LANGUAGE_MAP[language_code]
-            translate_prompt = f"""
-            Data is "{cleaned}".
-            You are given a JSON object. Your task is to translate only the values into {language_name} while keeping all the keys unchanged. Do not alter the structure, formatting, or order of the JSON.
-            Return the result strictly as a JSON object with the same keys and translated values.
-            """
-            translation = client.chat.completions.create(
-                model=api_keys_settings.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": f"You have to convert data into {language_name} Language"},
-                    {"role": "user", "content": translate_prompt}
-                ]
-            )
-            final_output = translation.choices[0].message.content or ""
-            trim_json = (
-                final_output.replace("json", "")
-                .replace("```", "")
-                .replace('\n', '')
-                .replace('\r', '')
-                .replace('\t', '')
-            )
-            trimmed_dict = _normalize_pre_screening_sections(json.loads(trim_json))
-            logger.info(f"Successfully translated data to {language_name}: {json.dumps(trimmed_dict, ensure_ascii=False)}")
-            return trimmed_dict
+        # Field-level translation through the translation memo
+        if script_language != language_code and language_code in LANGUAGE_MAP:
+            cache_key = convocall_cache_key(transcript_text, jdfile_text, vendor_id, intent_id, script_language)
+            translated = await translate_convocall_script(cache_key, parsed, language_code)
+            logger.info(f"Successfully translated data to {LANGUAGE_MAP[language_code]}: {json.dumps(translated, ensure_ascii=False)}")
+            return translated
         else:
             return parsed
 
@@ -251,6 +355,118 @@ def process_convocall(
         logger.error(f"Error processing convocall: {e}")
         raise
 
+async def stream_convocall(
+    transcript_text: Optional[str],
+    jdfile: Optional[str],
+    env: str,
+    vendor_id: str = "1",
+    intent_id: str = "1",
+    language_code: Literal["en", "pt", "es"] = "en",
+    bypass_cache: bool = False,
+    generation_mode: Optional[Literal["translate", "native"]] = None
+) -> AsyncIterator[dict]:
+    """
+    Streaming variant of process_convocall.
+
+    Yields {"event": ..., "data": ...} dicts: "token" for every model delta,
+    "status" before the translation pass, and a final "result" with the script.
+    A cached script, or one an identical request is already generating,
+    produces no "token" events.
+    """
+    jdfile_text = await extract_jd_text(jdfile, env)
+    script_language = generation_language(language_code, generation_mode)
+
+    cache_key = convocall_cache_key(transcript_text, jdfile_text, vendor_id, intent_id, script_language)
+    parsed = None if bypass_cache else await _lookup_script(cache_key)
+
+    if parsed is None:
+        shared = convocall_flight.joinable(cache_key)
+        if shared is not None:
+            logger.info("Joining call script generation already in flight")
+            parsed = copy.deepcopy(await shared)
+
+    if parsed is None:
+        messages = build_convocall_messages(
+            transcript_text or "",
+            jdfile_text,
+            vendor_id,
+            intent_id,
+            script_language
+        )
+        chunks = []
+        token_stream = llm_router.stream(
+            messages,
+            task="convocall",
+            intent_id=intent_id,
+            vendor_id=vendor_id,
+            language=script_language,
+        )
+        async for token in token_stream:
+            chunks.append(token)
+            yield {"event": "token", "data": {"text": token}}
+
+        try:
+            parsed = parse_convocall_script("".join(chunks))
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON parsing error: {e}")
+            raise ValueError(f"Failed to parse response as JSON: {e}")
+        validate_convocall_script(parsed)
+        await script_cache.store(cache_key, parsed)
+    else:
+        logger.info("Using cached call script")
+
+    if script_language != language_code and language_code in LANGUAGE_MAP:
+        yield {"event": "status", "data": {"stage": "translating", "language": language_code}}
+        parsed = await translate_convocall_script(cache_key, parsed, language_code)
+
+    yield {"event": "result", "data": parsed}
+
+async def process_convocall_languages(
+    transcript_text: Optional[str],
+    jdfile: Optional[str],
+    env: str,
+    language_codes: list[str],
+    vendor_id: str = "1",
+    intent_id: str = "1",
+    bypass_cache: bool = False
+) -> dict[str, dict]:
+    """
+    Generate the English script once and translate it into every requested
+    language concurrently.
+
+    Returns:
+        Mapping of language code to call script
+    """
+    try:
+        jdfile_text = await extract_jd_text(jdfile, env)
+
+        base = await get_convocall_script(
+            transcript_text,
+            jdfile_text,
+            vendor_id,
+            intent_id,
+            "en",
+            bypass_cache
+        )
+
+        codes = list(dict.fromkeys(language_codes))
+        targets = [code for code in codes if code != "en" and code in LANGUAGE_MAP]
+        cache_key = convocall_cache_key(transcript_text, jdfile_text, vendor_id, intent_id, "en")
+        translated = await asyncio.gather(*(translate_convocall_script(cache_key, base, code) for code in targets))
+
+        scripts = dict(zip(targets, translated))
+        if "en" in codes:
+            scripts["en"] = base
+        logger.info(f"Generated call scripts for languages: {', '.join(codes)}")
+        return {code: scripts[code] for code in codes if code in scripts}
+
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON parsing error: {e}")
+        raise ValueError(f"Failed to parse response as JSON: {e}")
+    except Exception as e:
+        logger.error(f"Error processing multi-language convocall: {e}")
+        raise
+
 def _normalize_pre_screening_sections(payload: dict) -> dict:
     key = "Pre-screening Questions"
     if key not in payload:
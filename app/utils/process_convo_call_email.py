@@ -1,93 +1,110 @@
+import copy
 import json
-from typing import Optional, Literal
-from openai import OpenAI
+from typing import AsyncIterator, Optional, Literal
 
-from app.core.config import api_keys_settings
-from app.utils.extract_text_from_file import extract_text_from_file
+from app.utils import script_cache
+from app.utils.extract_text_from_file import extract_jd_text
 from app.utils.language_map import LANGUAGE_MAP
+from app.utils.llm_router import llm_router
+from app.utils.single_flight import SingleFlight
+from app.utils.translation import translate_payload, generation_language, native_generation_instruction
 
 from app.utils.logger_util import logger
 
-# Set OpenAI API key from settings
-client = OpenAI(api_key=api_keys_settings.OPENAI_API_KEY)
+# Bump whenever the prompts below change
+EMAIL_PROMPT_VERSION = "1"
 
-def process_convocall_email(
+email_flight: SingleFlight[dict] = SingleFlight("email")
+
+def build_email_messages(
+    transcript_text: Optional[str],
+    jdfile_text: str,
+    intent_id: str,
+    language_code: str = "en"
+) -> list[dict]:
+    """Build the chat messages for the candidate email, in the given generation language."""
+    # Compose prompt based on intent
+    if intent_id == "13":
+        prompt = f"""
+            Write a short, professional hiring email to a candidate (who accepted our offer) informing them that background verification has started and simply state they will receive an email shortly (ask them to check spam), emphasize timely submission, and include the company name in the subject line.
+            Subject line of email should have [Company_Name] - Background Verification Process Initiated.
+            Do not use this line or any relevant lines like “Hope you're doing well!”. The signature of email must contain only [Your_Name] & the [Company_Name]. When you start the email introduce who you are with your name and then get into the context. Limit the email to 150 words. Display the email in an attractive and professional form, and output should in JSON with subject and body keys only and nothing else. Use [Candidate_Name] for candidate name. Context is here - "{transcript_text}". if you find email id from Context mention that they will receive an email shortly from this email id with detailed instructions and a document checklist.
+        """
+    else:
+        prompt = f"""
+            I want to send an email to a candidate. It is kind of notifying the candidate that you will receive a digital call at [Time] on [Date]. The email has details about the context and it also mentions a [Pre_Apply] which when clicked, candidates can pre apply as an alternative to the call. Subject line of email should have [Company_Name], role and location if mentioned. Do not use this line or any relevant lines like “Hope you're doing well!”. The signature of email must contain only [Your_Name] & the [Company_Name]. When you start the email introduce who you are with your name and then get into the context. Limit the email to 150 words. Display the email in an attractive and professional form, and output should in JSON with subject and body keys only and nothing else. Use [Candidate_Name] for candidate name. Context is here - "{transcript_text}" and "{jdfile_text}"
+        """
+
+    prompt += native_generation_instruction(language_code)
+
+    return [
+        {"role": "system", "content": "You have to give a conversation call flow"},
+        {"role": "user", "content": prompt}
+    ]
+
+def parse_email(result: str) -> dict:
+    """Strip code fences/whitespace from a model response and parse the email JSON."""
+    final_response = (
+        result.replace("json", "")
+        .replace("```", "")
+        .replace("\n", "")
+        .replace("\r", "")
+        .replace("\t", "")
+    )
+    return json.loads(final_response)
+
+async def process_convocall_email(
     transcript_text: Optional[str],
     jdfile: Optional[str],
     env: str,
     vendor_id: str = "1",
     intent_id: str = "1",
-    language_code: Literal["en", "pt", "es"] = "en"
+    language_code: Literal["en", "pt", "es"] = "en",
+    generation_mode: Optional[Literal["translate", "native"]] = None,
+    jdfile_text: Optional[str] = None
 ) -> dict:
     """
     Main function to process convo call email and generate email content.
+    In "native" generation_mode the email is written directly in the target language.
+    Pass jdfile_text when the JD has already been extracted for this request.
     """
     try:
-        # Extract text from file if provided
-        jdfile_text = ''
-        if jdfile and len(jdfile) > 4:
-            jdfile_text = extract_text_from_file(jdfile, env, 'jd')
-
-        # Compose prompt based on intent
-        if intent_id == "13":
-            prompt = f"""
-                Write a short, professional hiring email to a candidate (who accepted our offer) informing them that background verification has started and simply state they will receive an email shortly (ask them to check spam), emphasize timely submission, and include the company name in the subject line.
-                Subject line of email should have [Company_Name] - Background Verification Process Initiated.
-                Do not use this line or any relevant lines like “Hope you're doing well!”. The signature of email must contain only [Your_Name] & the [Company_Name]. When you start the email introduce who you are with your name and then get into the context. Limit the email to 150 words. Display the email in an attractive and professional form, and output should in JSON with subject and body keys only and nothing else. Use [Candidate_Name] for candidate name. Context is here - "{transcript_text}". if you find email id from Context mention that they will receive an email shortly from this email id with detailed instructions and a document checklist.
-            """
-        else:
-            prompt = f"""
-                I want to send an email to a candidate. It is kind of notifying the candidate that you will receive a digital call at [Time] on [Date]. The email has details about the context and it also mentions a [Pre_Apply] which when clicked, candidates can pre apply as an alternative to the call. Subject line of email should have [Company_Name], role and location if mentioned. Do not use this line or any relevant lines like “Hope you're doing well!”. The signature of email must contain only [Your_Name] & the [Company_Name]. When you start the email introduce who you are with your name and then get into the context. Limit the email to 150 words. Display the email in an attractive and professional form, and output should in JSON with subject and body keys only and nothing else. Use [Candidate_Name] for candidate name. Context is here - "{transcript_text}" and "{jdfile_text}"
-            """
-
-        response = client.chat.completions.create(
-            model=api_keys_settings.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": "You have to give a conversation call flow"},
-                {"role": "user", "content": prompt}
-            ]
-        )
+        # Extract text from file if provided (unless the caller already did)
+        if jdfile_text is None:
+            jdfile_text = await extract_jd_text(jdfile, env)
 
-        result = response.choices[0].message.content or ""
-        # Clean the response
-        final_response = (
-            result.replace("json", "")
-            .replace("```", "")
-            .replace("\n", "")
-            .replace("\r", "")
-            .replace("\t", "")
-        )
+        email_language = generation_language(language_code, generation_mode)
 
-        # Parse JSON
-        parsed = json.loads(final_response)
-        cleaned = json.dumps(parsed, separators=(',', ':'))
-
-        # Unified translation logic
-        if language_code != 'en' and language_code in LANGUAGE_MAP:
-            language_name = LANGUAGE_MAP[language_code]
-            translate_prompt = f"""
-            Data is "{cleaned}".
-            You are given a JSON object. Your task is to translate only the values into {language_name} while keeping all the keys unchanged. Do not alter the structure, formatting, or order of the JSON.
-            Return the result strictly as a JSON object with the same keys and translated values.
-            """
-            translation = client.chat.completions.create(
-                model=api_keys_settings.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": f"You have to convert data into {language_name} Language"},
-                    {"role": "user", "content": translate_prompt}
-                ]
-            )
-            final_output = translation.choices[0].message.content or ""
-            trim_json = (
-                final_output.replace("json", "")
-                .replace("```", "")
-                .replace('\n', '')
-                .replace('\r', '')
-                .replace('\t', '')
+        async def generate() -> dict:
+            result = await llm_router.complete(
+                build_email_messages(transcript_text, jdfile_text, intent_id, email_language),
+                task="email",
+                intent_id=intent_id,
+                vendor_id=vendor_id,
+                language=email_language,
             )
-            return json.loads(trim_json)
+            return parse_email(result)
+
+        # identical requests already generating share that LLM call
+        flight_key = script_cache.make_key(
+            "email",
+            EMAIL_PROMPT_VERSION,
+            llm_router.route_signature("email", intent_id, vendor_id, email_language),
+            transcript_text,
+            jdfile_text,
+            intent_id,
+            email_language,
+        )
+        parsed = copy.deepcopy(await email_flight.do(flight_key, generate))
+
+        # Field-level translation through the translation memo, shared the same way
+        if email_language != language_code and language_code in LANGUAGE_MAP:
+            async def translate() -> dict:
+                return await translate_payload(parsed, language_code)
+
+            return copy.deepcopy(await email_flight.do(f"{flight_key}:translate:{language_code}", translate))
         else:
-            return json.loads(cleaned)
+            return parsed
 
     except json.JSONDecodeError as e:
         logger.error(f"JSON parsing error: {e}")
@@ -96,4 +113,45 @@ def process_convocall_email(
         logger.error(f"Error processing convocall email: {e}")
         raise
 
+async def stream_convocall_email(
+    transcript_text: Optional[str],
+    jdfile: Optional[str],
+    env: str,
+    vendor_id: str = "1",
+    intent_id: str = "1",
+    language_code: Literal["en", "pt", "es"] = "en",
+    generation_mode: Optional[Literal["translate", "native"]] = None
+) -> AsyncIterator[dict]:
+    """
+    Streaming variant of process_convocall_email.
+
+    Yields {"event": ..., "data": ...} dicts: "token" for every model delta,
+    "status" before the translation pass, and a final "result" with the email.
+    """
+    jdfile_text = await extract_jd_text(jdfile, env)
+    email_language = generation_language(language_code, generation_mode)
+
+    chunks = []
+    messages = build_email_messages(transcript_text, jdfile_text, intent_id, email_language)
+    token_stream = llm_router.stream(
+        messages,
+        task="email",
+        intent_id=intent_id,
+        vendor_id=vendor_id,
+        language=email_language,
+    )
+    async for token in token_stream:
+        chunks.append(token)
+        yield {"event": "token", "data": {"text": token}}
+
+    try:
+        parsed = parse_email("".join(chunks))
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON parsing error: {e}")
+        raise ValueError(f"Failed to parse response as JSON: {e}")
+
+    if email_language != language_code and language_code in LANGUAGE_MAP:
+        yield {"event": "status", "data": {"stage": "translating", "language": language_code}}
+        parsed = await translate_payload(parsed, language_code)
 
+    yield {"event": "result", "data": parsed}
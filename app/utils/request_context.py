@@ -0,0 +1,26 @@
+# app/utils/request_context.py
+
+from typing import Optional
+
+from fastapi import Request
+from starlette.types import Scope
+
+from app.utils.logger_util import job_id_ctx
+
+
+def request_state(scope: Scope) -> dict:
+    """The dict behind request.state for this request, created if missing."""
+    return scope.setdefault("state", {})
+
+
+def bind_job_id(request: Request, job_id: Optional[str]) -> None:
+    """
+    Attach a job_id parsed by a route/form dependency to the current request.
+
+    LoggingMiddleware never reads the body, so job_id sent as a form/JSON field
+    is only known once FastAPI has parsed it; it is picked up from
+    request_state() when the request logs are flushed.
+    """
+    if job_id:
+        request.state.job_id = job_id
+        job_id_ctx.set(job_id)
@@ -0,0 +1,161 @@
+# app/utils/resilience.py
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app.utils.logger_util import logger
+from app.utils.metrics import circuit_breaker_state, circuit_breaker_rejections, hedged_requests
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable (circuit open, retry in {retry_after:.0f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class StageDeadlineExceeded(asyncio.TimeoutError):
+    """A pipeline stage ran past its configured deadline."""
+
+    def __init__(self, stage: str, seconds: float):
+        super().__init__(f"{stage} exceeded its {seconds:g}s deadline")
+        self.stage = stage
+
+
+async def with_deadline(awaitable: Awaitable[T], seconds: float, stage: str) -> T:
+    """Await with a per-stage deadline; seconds <= 0 disables it."""
+    if seconds <= 0:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=seconds)
+    except asyncio.TimeoutError:
+        raise StageDeadlineExceeded(stage, seconds)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: calls go through; failure_threshold consecutive failures open it.
+    Open: calls fail fast with CircuitOpenError for reset_seconds.
+    Half-open: one probe call goes through; success closes, failure re-opens.
+    Not thread-safe; meant to be used from the event loop only.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        circuit_breaker_state.labels(name).set(self.state)
+
+    def _set_state(self, state: int) -> None:
+        if state != self.state:
+            logger.warning(f"Circuit breaker {self.name}: {self._names[self.state]} -> {self._names[state]}")
+        self.state = state
+        circuit_breaker_state.labels(self.name).set(state)
+
+    _names = {CLOSED: "closed", OPEN: "open", HALF_OPEN: "half-open"}
+
+    def allow(self) -> None:
+        """Raise CircuitOpenError unless a call may go to the upstream now."""
+        if self.failure_threshold <= 0 or self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0:
+                circuit_breaker_rejections.labels(self.name).inc()
+                raise CircuitOpenError(self.name, remaining)
+            self._set_state(self.HALF_OPEN)
+        # half-open: let exactly one probe through
+        if self._probe_in_flight:
+            circuit_breaker_rejections.labels(self.name).inc()
+            raise CircuitOpenError(self.name, self.reset_seconds)
+        self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probe_in_flight = False
+        self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def release_probe(self) -> None:
+        """The probe ended without a verdict (e.g. cancelled); let another one through."""
+        self._probe_in_flight = False
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies for quantile estimates."""
+
+    def __init__(self, window: int = 200):
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        """The q-quantile of the window, or None until min_samples were observed."""
+        if len(self.samples) < max(1, min_samples):
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+async def hedged(
+    call: Callable[[], Awaitable[T]],
+    hedge_after: Optional[float],
+    name: str,
+    should_hedge: Callable[[], bool] = lambda: True,
+) -> T:
+    """
+    Run call(); if it has not finished after hedge_after seconds, start a second
+    call() and return whichever succeeds first, cancelling the other.
+
+    hedge_after=None disables hedging. should_hedge is checked when the timer
+    fires (e.g. skip when there is no spare upstream capacity). If both calls
+    fail, the first failure is raised.
+    """
+    first = asyncio.ensure_future(call())
+    if hedge_after is None:
+        return await first
+
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done and should_hedge():
+            hedged_requests.labels(name, "fired").inc()
+            tasks.append(asyncio.ensure_future(call()))
+
+        errors: list[BaseException] = []
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not first:
+                        hedged_requests.labels(name, "won").inc()
+                    return task.result()
+                errors.append(task.exception())
+        raise errors[0]
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
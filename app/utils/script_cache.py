@@ -0,0 +1,123 @@
+# app/utils/script_cache.py
+
+import copy
+import datetime
+import hashlib
+import json
+import re
+from typing import Optional
+
+from app.core.config import cache_settings
+from app.db.mongo_session import ensure_index, get_mongo_db
+from app.utils.logger_util import logger
+from app.utils.metrics import script_cache_requests
+from app.utils.ttl_cache import TTLCache
+
+COLLECTION_NAME = "script_cache"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+memory_cache: TTLCache[dict] = TTLCache(
+    max_entries=cache_settings.SCRIPT_CACHE_MEMORY_MAX_ENTRIES,
+    ttl_seconds=cache_settings.SCRIPT_CACHE_MEMORY_TTL_SECONDS,
+)
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Collapse whitespace so cosmetic differences map to the same key."""
+    return _WHITESPACE_RE.sub(" ", text or "").strip()
+
+
+def make_key(namespace: str, prompt_version: str, model: str, *parts: Optional[str]) -> str:
+    """
+    Build a cache key from the normalized inputs, the model and the prompt version.
+
+    Args:
+        namespace: Pipeline the value belongs to (e.g. "convocall")
+        prompt_version: Version of the prompt template, bump it when prompts change
+        model: Model the value was generated with
+        parts: Request inputs (transcript, JD text, vendor_id, intent_id, ...)
+    """
+    payload = json.dumps(
+        [namespace, prompt_version, model, *[normalize_text(p) for p in parts]],
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+    return f"{namespace}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def _namespace(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+async def lookup(key: str) -> Optional[dict]:
+    """Look a value up in memory, then in MongoDB. Returns a copy the caller may mutate."""
+    if not cache_settings.SCRIPT_CACHE_ENABLED:
+        return None
+    namespace = _namespace(key)
+
+    value = memory_cache.get(key)
+    if value is not None:
+        script_cache_requests.labels(namespace, "memory", "hit").inc()
+        return copy.deepcopy(value)
+    script_cache_requests.labels(namespace, "memory", "miss").inc()
+
+    try:
+        doc = await get_mongo_db()[COLLECTION_NAME].find_one({"_id": key})
+    except Exception as e:
+        logger.warning(f"Script cache lookup failed: {e}")
+        return None
+
+    if doc is None:
+        script_cache_requests.labels(namespace, "mongo", "miss").inc()
+        return None
+
+    script_cache_requests.labels(namespace, "mongo", "hit").inc()
+    memory_cache.set(key, doc["value"])
+    return copy.deepcopy(doc["value"])
+
+
+async def store(key: str, value: dict) -> None:
+    """Store a value in both tiers; MongoDB failures are logged and ignored."""
+    if not cache_settings.SCRIPT_CACHE_ENABLED:
+        return
+    memory_cache.set(key, copy.deepcopy(value))
+    try:
+        await get_mongo_db()[COLLECTION_NAME].replace_one(
+            {"_id": key},
+            {"_id": key, "value": value, "created_at": datetime.datetime.utcnow()},
+            upsert=True,
+        )
+    except Exception as e:
+        logger.warning(f"Script cache write failed: {e}")
+
+
+async def invalidate(namespace: Optional[str] = None) -> int:
+    """
+    Drop cached values, for one namespace or everything.
+    The memory tier is only cleared on the worker handling the call.
+
+    Returns:
+        Number of MongoDB documents removed
+    """
+    if namespace is None:
+        memory_cache.clear()
+        query: dict = {}
+    else:
+        for key in [k for k in memory_cache.keys() if _namespace(str(k)) == namespace]:
+            memory_cache.pop(key)
+        query = {"_id": {"$regex": f"^{re.escape(namespace)}:"}}
+
+    result = await get_mongo_db()[COLLECTION_NAME].delete_many(query)
+    logger.info(f"Invalidated {result.deleted_count} cached scripts")
+    return result.deleted_count
+
+
+async def ensure_indexes() -> None:
+    """Create the TTL index that expires MongoDB entries."""
+    await ensure_index(
+        get_mongo_db()[COLLECTION_NAME],
+        "created_at",
+        name="created_at_ttl",
+        expire_after_seconds=cache_settings.SCRIPT_CACHE_MONGO_TTL_SECONDS,
+    )
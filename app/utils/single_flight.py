@@ -0,0 +1,58 @@
+# app/utils/single_flight.py
+
+import asyncio
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+from app.utils.metrics import single_flight_requests
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Deduplicate concurrent calls that share a key.
+
+    The first caller for a key starts the work as a task; callers arriving while
+    it is in flight await the same task and get its result (or exception). The
+    key is forgotten as soon as the task finishes, so this never serves stale
+    results - caching is the script cache's job.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is not None:
+            single_flight_requests.labels(self.name, "coalesced").inc()
+        else:
+            single_flight_requests.labels(self.name, "leader").inc()
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+
+        # shielded: one caller disconnecting must not cancel the work the others wait on
+        return await asyncio.shield(task)
+
+    def joinable(self, key: str) -> Optional[Awaitable[T]]:
+        """
+        The shared result for key if it is already in flight, else None. For
+        callers that cannot run their work through do() (e.g. a stream that
+        yields to its own client) but should not duplicate work under way.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            return None
+        single_flight_requests.labels(self.name, "coalesced").inc()
+        return asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # mark the exception retrieved in case every waiter went away
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,160 @@
+# app/utils/translation.py
+
+import asyncio
+import datetime
+import hashlib
+from typing import Any, Optional
+
+from app.core.config import cache_settings, generation_settings
+from app.db.mongo_session import get_mongo_db
+from app.utils.language_map import LANGUAGE_MAP, NATIVE_GENERATION_INSTRUCTIONS
+from app.utils.logger_util import logger
+from app.utils.metrics import translation_memo_requests
+from app.utils.llm_router import llm_router
+from app.utils.ttl_cache import TTLCache
+
+COLLECTION_NAME = "translation_memo"
+
+# Bump when the per-field prompt changes so old memo entries are not reused
+TRANSLATION_PROMPT_VERSION = "1"
+
+memo_cache: TTLCache[str] = TTLCache(
+    max_entries=cache_settings.TRANSLATION_MEMO_MEMORY_MAX_ENTRIES,
+    ttl_seconds=cache_settings.TRANSLATION_MEMO_MEMORY_TTL_SECONDS,
+)
+
+
+def generation_language(language_code: str, generation_mode: Optional[str] = None) -> str:
+    """
+    Language the LLM should write in for this request.
+
+    Returns language_code in "native" mode (request override, else
+    GENERATION_LANGUAGE_MODE) when a native prompt variant exists, otherwise
+    "en", meaning generate in English and translate afterwards.
+    """
+    mode = generation_mode or generation_settings.GENERATION_LANGUAGE_MODE
+    if mode == "native" and language_code in NATIVE_GENERATION_INSTRUCTIONS:
+        return language_code
+    return "en"
+
+
+def native_generation_instruction(language_code: str) -> str:
+    """Prompt suffix asking for output directly in the given language ('' for English)."""
+    return NATIVE_GENERATION_INSTRUCTIONS.get(language_code, "")
+
+
+def _source_hash(text: str, route: str) -> str:
+    # the route's targets are part of the key, so changing the translation model does not reuse old output
+    return hashlib.sha256(f"{TRANSLATION_PROMPT_VERSION}\n{route}\n{text}".encode("utf-8")).hexdigest()
+
+
+def _memo_id(text: str, language_code: str, route: str) -> str:
+    return f"{language_code}:{_source_hash(text, route)}"
+
+
+def _collect_strings(value: Any, out: list[str]) -> None:
+    if isinstance(value, str):
+        if any(ch.isalpha() for ch in value):
+            out.append(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_strings(item, out)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_strings(item, out)
+
+
+def _rebuild(value: Any, translations: dict[str, str]) -> Any:
+    if isinstance(value, str):
+        return translations.get(value, value)
+    if isinstance(value, dict):
+        return {key: _rebuild(item, translations) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rebuild(item, translations) for item in value]
+    return value
+
+
+async def _load_memo(texts: list[str], language_code: str, route: str) -> dict[str, str]:
+    found: dict[str, str] = {}
+    pending: dict[str, str] = {}
+    for text in texts:
+        memo_id = _memo_id(text, language_code, route)
+        cached = memo_cache.get(memo_id)
+        if cached is not None:
+            found[text] = cached
+        else:
+            pending[memo_id] = text
+
+    if pending:
+        try:
+            cursor = get_mongo_db()[COLLECTION_NAME].find(
+                {"_id": {"$in": list(pending)}}, {"translated": 1}
+            )
+            async for doc in cursor:
+                text = pending[doc["_id"]]
+                found[text] = doc["translated"]
+                memo_cache.set(doc["_id"], doc["translated"])
+        except Exception as e:
+            logger.warning(f"Translation memo lookup failed: {e}")
+
+    return found
+
+
+async def _save_memo(translated: dict[str, str], language_code: str, route: str) -> None:
+    now = datetime.datetime.utcnow()
+    docs = []
+    for text, value in translated.items():
+        memo_id = _memo_id(text, language_code, route)
+        memo_cache.set(memo_id, value)
+        docs.append({"_id": memo_id, "language": language_code, "translated": value, "created_at": now})
+
+    try:
+        await get_mongo_db()[COLLECTION_NAME].insert_many(docs, ordered=False)
+    except Exception as e:
+        # duplicate ids from a concurrent request are expected and harmless
+        logger.debug(f"Translation memo write incomplete: {e}")
+
+
+async def translate_text(text: str, language_name: str, language_code: Optional[str] = None) -> str:
+    """Translate a single field value with the LLM (routed as the "translation" task)."""
+    prompt = f"""
+    Translate the text between the <text> tags into {language_name}.
+    Keep placeholders such as [Candidate_Name] or {{{{Your_Name}}}}, SSML tags such as <break time="1s"/>, numbers written as words, and line breaks unchanged.
+    Return only the translated text, without the tags, quotes or any explanation.
+    <text>{text}</text>
+    """
+    translated = await llm_router.complete([
+        {"role": "system", "content": f"You have to convert data into {language_name} Language"},
+        {"role": "user", "content": prompt}
+    ], task="translation", language=language_code)
+    return translated.strip()
+
+
+async def translate_payload(payload: Any, language_code: str) -> Any:
+    """
+    Translate every string value of a JSON-like payload, keeping keys and structure.
+
+    Each distinct value is looked up in the (source_text_hash, language) memo,
+    keyed on the translation route too; only misses go to the LLM, concurrently,
+    and are written back to the memo.
+    """
+    language_name = LANGUAGE_MAP[language_code]
+    route = llm_router.route_signature("translation", language=language_code)
+
+    texts: list[str] = []
+    _collect_strings(payload, texts)
+    unique_texts = list(dict.fromkeys(texts))
+
+    translations = await _load_memo(unique_texts, language_code, route)
+    misses = [text for text in unique_texts if text not in translations]
+    translation_memo_requests.labels(language_code, "hit").inc(len(unique_texts) - len(misses))
+    translation_memo_requests.labels(language_code, "miss").inc(len(misses))
+
+    if misses:
+        results = await asyncio.gather(*(translate_text(text, language_name, language_code) for text in misses))
+        fresh = dict(zip(misses, results))
+        translations.update(fresh)
+        await _save_memo(fresh, language_code, route)
+
+    logger.info(f"Translated {len(unique_texts)} fields to {language_name} ({len(misses)} via LLM)")
+    return _rebuild(payload, translations)
@@ -0,0 +1,182 @@
+# app/utils/webhook.py
+
+import asyncio
+import datetime
+import ipaddress
+import socket
+from typing import Literal, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from app.core.config import webhook_settings
+from app.db.mongo_session import get_mongo_db
+from app.utils.logger_util import logger
+
+DELIVERY_COLLECTION_NAME = "webhook_deliveries"
+
+
+class WebhookSession:
+    client: Optional[httpx.AsyncClient] = None
+
+webhook_session = WebhookSession()
+
+
+def get_webhook_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive client used for callback delivery."""
+    if webhook_session.client is None:
+        webhook_session.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=webhook_settings.WEBHOOK_MAX_CONNECTIONS,
+                max_keepalive_connections=webhook_settings.WEBHOOK_MAX_CONNECTIONS,
+            ),
+            timeout=webhook_settings.WEBHOOK_TIMEOUT_SECONDS,
+        )
+    return webhook_session.client
+
+
+async def close_webhook_client() -> None:
+    if webhook_session.client is not None:
+        await webhook_session.client.aclose()
+        webhook_session.client = None
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def validate_callback_url(url: str) -> str:
+    """
+    Check a callback URL is http(s), on an allowed host if an allowlist is
+    configured, and not a loopback/private/link-local address literal unless
+    WEBHOOK_ALLOW_PRIVATE_HOSTS is set. Names are re-checked after DNS
+    resolution when the callback is sent, and that address is the one used.
+
+    Raises:
+        ValueError: if the URL is not acceptable
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("callback_url must be an absolute http(s) URL")
+
+    host = parsed.hostname.lower()
+    allowed = {h.strip().lower() for h in webhook_settings.WEBHOOK_ALLOWED_HOSTS.split(",") if h.strip()}
+    if allowed and host not in allowed:
+        raise ValueError(f"callback_url host {parsed.hostname} is not allowed")
+
+    if not webhook_settings.WEBHOOK_ALLOW_PRIVATE_HOSTS:
+        if host == "localhost" or host.endswith(".localhost"):
+            raise ValueError(f"callback_url host {parsed.hostname} is not allowed")
+        try:
+            public = _is_public_address(host)
+        except ValueError:
+            # a DNS name; checked once resolved
+            return url
+        if not public:
+            raise ValueError(f"callback_url host {parsed.hostname} is not a public address")
+    return url
+
+
+async def _resolve_public_address(url: httpx.URL) -> str:
+    """
+    Resolve the callback host once and return the address to connect to.
+
+    Raises:
+        ValueError: if any resolved address is private, loopback, link-local or reserved
+    """
+    port = url.port or (443 if url.scheme == "https" else 80)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(url.host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise ValueError(f"callback_url host {url.host} does not resolve: {e}")
+    for *_, sockaddr in infos:
+        if not _is_public_address(sockaddr[0]):
+            raise ValueError(f"callback_url host {url.host} resolves to non-public address {sockaddr[0]}")
+    return infos[0][4][0]
+
+
+async def _post_callback(url: str, payload: dict) -> httpx.Response:
+    """
+    POST to the callback. Unless WEBHOOK_ALLOW_PRIVATE_HOSTS is set, the
+    connection goes to the address that was checked, with the original Host
+    header and TLS server name, so a DNS answer that changes between the
+    check and the connect (rebinding) cannot redirect it to a private host.
+    """
+    client = get_webhook_client()
+    if webhook_settings.WEBHOOK_ALLOW_PRIVATE_HOSTS:
+        return await client.post(url, json=payload)
+
+    target = httpx.URL(url)
+    address = await _resolve_public_address(target)
+    extensions = {"sni_hostname": target.host} if target.scheme == "https" else {}
+    return await client.post(
+        target.copy_with(host=address),
+        json=payload,
+        headers={"Host": target.netloc.decode("ascii")},
+        extensions=extensions,
+    )
+
+
+async def _log_delivery(entry: dict) -> None:
+    try:
+        await get_mongo_db()[DELIVERY_COLLECTION_NAME].insert_one(entry)
+    except Exception as e:
+        logger.warning(f"Failed to record webhook delivery: {e}")
+
+
+async def send_webhook(
+    url: str,
+    payload: dict,
+    delivery_ref: Optional[str] = None,
+    attempt: int = 1,
+) -> Literal["delivered", "retry", "rejected"]:
+    """
+    Make one delivery attempt: POST payload as JSON to url and record the
+    attempt in webhook_deliveries. Retries and backoff are up to the caller,
+    so a slow receiver never holds a worker for more than one timeout.
+
+    Returns:
+        "delivered" on 2xx, "retry" on transport errors, timeouts, 429 and 5xx,
+        "rejected" on any other status or a callback host that is not allowed
+    """
+    started = datetime.datetime.utcnow()
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    outcome: Literal["delivered", "retry", "rejected"]
+    try:
+        response = await _post_callback(url, payload)
+        status_code = response.status_code
+    except ValueError as e:
+        error = str(e)
+        outcome = "rejected"
+    except httpx.HTTPError as e:
+        error = repr(e)
+        outcome = "retry"
+    else:
+        if 200 <= status_code < 300:
+            outcome = "delivered"
+        elif status_code == 429 or status_code >= 500:
+            outcome = "retry"
+        else:
+            outcome = "rejected"
+
+    await _log_delivery({
+        "ref": delivery_ref,
+        "url": url,
+        "attempt": attempt,
+        "status_code": status_code,
+        "error": error,
+        "delivered": outcome == "delivered",
+        "created_at": started,
+    })
+
+    if outcome == "delivered":
+        logger.info(f"Webhook for {delivery_ref} delivered to {url}")
+    elif outcome == "rejected":
+        logger.error(f"Webhook for {delivery_ref} rejected by {url}: {status_code or error}")
+    else:
+        logger.warning(f"Webhook attempt {attempt} for {delivery_ref} failed ({status_code or error})")
+    return outcome
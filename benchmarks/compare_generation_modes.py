@@ -0,0 +1,89 @@
+# benchmarks/compare_generation_modes.py
+#
+# Compare the two-step (generate in English, then translate) and native
+# (generate directly in the target language) call-script pipelines on latency
+# and on how often the output validates against ProcessConvocallResponse.
+#
+# Needs the usual .env (OPENAI_API_KEY etc.); MongoDB is optional, caches are
+# bypassed/cleared so every run pays for real LLM calls.
+#
+#   python -m benchmarks.compare_generation_modes --runs 5 --languages pt es
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from pydantic import ValidationError
+
+from app.schemas.process_call_and_email import ProcessConvocallResponse
+from app.utils.llm_providers import close_providers
+from app.utils.process_call_convo import process_convocall
+from app.utils import translation
+
+SAMPLE_TRANSCRIPT = (
+    "We are hiring a Senior Backend Engineer (Python, FastAPI, MongoDB) for our Bangalore office. "
+    "Hybrid, 3 days on site. 5+ years of experience, notice period up to 30 days."
+)
+
+
+async def _run_once(mode: str, language_code: str, vendor_id: str, intent_id: str) -> tuple[float, bool, str]:
+    translation.memo_cache.clear()
+    started = time.perf_counter()
+    try:
+        result = await process_convocall(
+            transcript_text=SAMPLE_TRANSCRIPT,
+            jdfile=None,
+            env="dev",
+            vendor_id=vendor_id,
+            intent_id=intent_id,
+            language_code=language_code,  # type: ignore[arg-type]
+            bypass_cache=True,
+            generation_mode=mode,  # type: ignore[arg-type]
+        )
+    except Exception as e:
+        return time.perf_counter() - started, False, f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - started
+
+    try:
+        ProcessConvocallResponse.model_validate(result)
+    except ValidationError as e:
+        return elapsed, False, f"schema: {e.error_count()} errors"
+    return elapsed, True, ""
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare translate vs native generation modes")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--languages", nargs="+", default=["pt", "es"])
+    parser.add_argument("--vendor-id", default="2")
+    parser.add_argument("--intent-id", default="1")
+    args = parser.parse_args()
+
+    print(f"{'lang':<6}{'mode':<11}{'mean s':>9}{'p50 s':>9}{'p95 s':>9}{'schema ok':>12}")
+    for language_code in args.languages:
+        for mode in ("translate", "native"):
+            latencies, passed = [], 0
+            for _ in range(args.runs):
+                elapsed, ok, error = await _run_once(mode, language_code, args.vendor_id, args.intent_id)
+                latencies.append(elapsed)
+                passed += ok
+                if error:
+                    print(f"  {language_code}/{mode}: {error}")
+            print(
+                f"{language_code:<6}{mode:<11}{statistics.mean(latencies):>9.2f}"
+                f"{statistics.median(latencies):>9.2f}{_percentile(latencies, 95):>9.2f}"
+                f"{f'{passed}/{args.runs}':>12}"
+            )
+
+    await close_providers()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+# benchmarks/fake_upstreams.py
+#
+# Local stand-ins for the OpenAI chat completions API and the document
+# extraction API, with configurable latency, slow tail and error rate, for
+# exercising deadlines, hedging and circuit breakers without real upstreams.
+#
+#   python -m benchmarks.fake_upstreams --port 8900 --slow-fraction 0.05 --slow-latency 10
+#
+# then run the app (or a benchmark) with
+#
+#   OPENAI_BASE_URL=http://127.0.0.1:8900/v1 DOC_EXTRACT_API_URL=http://127.0.0.1:8900/extract
+#
+# Behaviour can be changed while running, e.g. to simulate an outage:
+#
+#   curl -X POST localhost:8900/admin/config -H 'content-type: application/json' \
+#        -d '{"llm": {"error_rate": 1.0}}'
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from app.utils.llm_providers import fake_answer
+
+# upstream name -> behaviour; mutable through /admin/config
+config = {
+    "llm": {"latency": 1.0, "jitter": 0.3, "slow_fraction": 0.0, "slow_latency": 10.0, "error_rate": 0.0},
+    "extract": {"latency": 0.2, "jitter": 0.05, "slow_fraction": 0.0, "slow_latency": 10.0, "error_rate": 0.0},
+}
+stats = {"llm": 0, "extract": 0}
+
+app = FastAPI(title="Fake upstreams")
+
+
+async def _behave(upstream: str):
+    """Sleep like the configured upstream; returns an error response to send instead, if any."""
+    stats[upstream] += 1
+    behaviour = config[upstream]
+    if random.random() < behaviour["slow_fraction"]:
+        delay = behaviour["slow_latency"]
+    else:
+        delay = max(0.0, random.gauss(behaviour["latency"], behaviour["jitter"]))
+    await asyncio.sleep(delay)
+    if random.random() < behaviour["error_rate"]:
+        return JSONResponse(status_code=503, content={"error": {"message": "fake upstream failure"}})
+    return None
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    error = await _behave("llm")
+    if error is not None:
+        return error
+
+    content = fake_answer(body.get("messages", []))
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    model = body.get("model", "fake")
+
+    if not body.get("stream"):
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    async def events():
+        for i in range(0, len(content), 16):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": content[i:i + 16]}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(0.01)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/extract")
+async def extract(reckFname: str, type: str = "jd", env: str = "dev"):
+    error = await _behave("extract")
+    if error is not None:
+        return error
+    return PlainTextResponse(f"Job description extracted from {reckFname}: Senior Backend Engineer, Python.")
+
+
+@app.post("/admin/config")
+async def update_config(changes: dict):
+    for upstream, values in changes.items():
+        config[upstream].update(values)
+    return config
+
+
+@app.get("/admin/stats")
+async def get_stats():
+    return {"config": config, "requests": stats}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI and document extraction upstreams.")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=1.0, help="typical LLM latency in seconds")
+    parser.add_argument("--slow-fraction", type=float, default=0.0, help="fraction of LLM calls that are slow")
+    parser.add_argument("--slow-latency", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of LLM calls answering 503")
+    args = parser.parse_args()
+
+    config["llm"].update(
+        latency=args.latency,
+        slow_fraction=args.slow_fraction,
+        slow_latency=args.slow_latency,
+        error_rate=args.error_rate,
+    )
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/logging_middleware_throughput.py
+#
+# Throughput of the request-logging middleware before (BaseHTTPMiddleware that
+# reads and re-parses the body to find job_id) and after (pure ASGI, job_id from
+# headers/query or the already-parsed form). Both variants serve the same
+# multipart endpoint with a JD upload, in-process via httpx's ASGI transport, so
+# the numbers isolate middleware + parsing cost. No MongoDB or OpenAI needed.
+#
+#   python -m benchmarks.logging_middleware_throughput --requests 500 --concurrency 16 --jd-kb 512
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Optional
+
+import httpx
+from fastapi import Depends, FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware.logging_middleware import LoggingMiddleware
+from app.schemas.process_call_and_email import ProcessConvocallForm
+from app.utils.logger_util import logger, request_id_ctx, job_id_ctx, mongo_handler, stream_handler
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """The previous middleware, kept here as the baseline."""
+    async def dispatch(self, request: Request, call_next):
+        req_id = str(uuid.uuid4())
+        request_id_ctx.set(req_id)
+        job_id = None
+        body_bytes = await request.body()
+        content_type = request.headers.get("content-type", "")
+        if "application/x-www-form-urlencoded" in content_type or "multipart/form-data" in content_type:
+            form = await request.form()
+            job_id = form.get("job_id")
+        elif body_bytes:
+            try:
+                body_json = json.loads(body_bytes.decode("utf-8"))
+                if isinstance(body_json, dict):
+                    job_id = body_json.get("job_id")
+            except Exception:
+                pass
+        job_id = job_id or request.query_params.get("job_id") or request.headers.get("x-job-id")
+        job_id_ctx.set(job_id)
+
+        logger.info(f"{request.method} {request.url.path} - Request started")
+        response = await call_next(request)
+        logger.info(f"Request completed with status {response.status_code}")
+        await mongo_handler.flush_request_logs(req_id, {
+            "path": request.url.path,
+            "method": request.method,
+            "status_code": response.status_code,
+        })
+        request_id_ctx.set(None)
+        job_id_ctx.set(None)
+        return response
+
+
+def _build_app(middleware) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware)
+
+    @app.post("/convocall")
+    async def convocall(data: tuple = Depends(ProcessConvocallForm.as_form)):
+        form, jdfile = data
+        size = len(await jdfile.read()) if jdfile else 0
+        return {"job_id": form.job_id, "jd_bytes": size}
+
+    return app
+
+
+def _drain_log_queue() -> None:
+    # no background writer here; keep the queue from filling up and spilling
+    while not mongo_handler.queue.empty():
+        mongo_handler.queue.get_nowait()
+
+
+async def _run(app: FastAPI, requests: int, concurrency: int, jd: bytes) -> float:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int) -> Optional[int]:
+            async with semaphore:
+                response = await client.post(
+                    "/convocall",
+                    data={"job_id": f"job-{i}", "transcript_text": "hello", "env": "dev"},
+                    files={"jdfile": ("jd.txt", jd, "text/plain")},
+                )
+                _drain_log_queue()
+                return response.status_code
+
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    failed = sum(1 for s in statuses if s != 200)
+    if failed:
+        print(f"  {failed} requests failed")
+    return requests / elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare legacy and ASGI logging middleware throughput.")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--jd-kb", type=int, default=512, help="size of the uploaded JD file")
+    args = parser.parse_args()
+
+    jd = b"x" * (args.jd_kb * 1024)
+    # keep console logging out of the measurement
+    logger.removeHandler(stream_handler)
+
+    for name, middleware in (("before (BaseHTTPMiddleware)", LegacyLoggingMiddleware), ("after (pure ASGI)", LoggingMiddleware)):
+        app = _build_app(middleware)
+        await _run(app, min(50, args.requests), args.concurrency, jd)  # warm-up
+        rps = await _run(app, args.requests, args.concurrency, jd)
+        print(f"{name:<30} {rps:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
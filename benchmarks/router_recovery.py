@@ -0,0 +1,95 @@
+# benchmarks/router_recovery.py
+#
+# Check that the LLM router hands traffic back to the preferred target after it
+# recovers from a short burst of failures. Runs against the local fake
+# provider (no network, no MongoDB) with a primary and a fallback target:
+# warm up, fail the primary a few times, let it recover, and count which
+# target served each window of calls. Exits non-zero if the primary has not
+# taken its traffic back by the last window.
+#
+#   python -m benchmarks.router_recovery --failures 2 --calls 1000
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from typing import Optional
+
+from app.core.config import llm_routing_settings
+from app.utils.llm_providers import FakeProvider, FakeProviderError, register_provider
+from app.utils.llm_router import LLMRouter
+from app.utils.resilience import LatencyTracker
+
+PRIMARY = "fake:primary"
+BACKUP = "fake:backup"
+
+
+class FlakyProvider(FakeProvider):
+    """Fake provider that fails calls to the models in failing, and records which model answered."""
+
+    def __init__(self, latency: float):
+        super().__init__(latency=latency)
+        self.failing: set[str] = set()
+        self.served: Counter = Counter()
+        self.failed: Counter = Counter()
+
+    async def complete(self, messages: list[dict], model: str, latency: Optional[LatencyTracker] = None) -> str:
+        await asyncio.sleep(self.latency)
+        if model in self.failing:
+            self.failed[model] += 1
+            raise FakeProviderError(f"fake provider failure ({model})")
+        self.served[model] += 1
+        return "ok"
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the LLM router returns to a recovered primary target")
+    parser.add_argument("--failures", type=int, default=2, help="failed calls on the primary before it recovers")
+    parser.add_argument("--calls", type=int, default=1000, help="calls after the primary recovers")
+    parser.add_argument("--window", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.005, help="fake call latency in seconds")
+    parser.add_argument("--min-share", type=float, default=0.8, help="primary share required in the last window")
+    args = parser.parse_args()
+
+    provider = FlakyProvider(args.latency)
+    register_provider(provider)
+    llm_routing_settings.LLM_DEFAULT_TARGETS = [PRIMARY]
+    llm_routing_settings.LLM_FALLBACK_TARGETS = [BACKUP]
+    router = LLMRouter()
+    messages = [{"role": "user", "content": "hi"}]
+
+    async def call() -> None:
+        await router.complete(messages, task="convocall")
+
+    for _ in range(50):
+        await call()
+
+    # once demoted, the primary only sees probes, so this may take a few dozen calls
+    provider.failing.add("primary")
+    while provider.failed["primary"] < args.failures:
+        await call()
+    provider.failing.clear()
+
+    print(f"after {args.failures} primary failures: order {router.order([PRIMARY, BACKUP])}")
+    share = 0.0
+    for start in range(0, args.calls, args.window):
+        provider.served.clear()
+        for _ in range(min(args.window, args.calls - start)):
+            await call()
+        total = sum(provider.served.values())
+        share = provider.served["primary"] / total if total else 0.0
+        stats = router.stats[PRIMARY]
+        print(
+            f"calls {start:>5}-{start + total - 1:<5} primary {provider.served['primary']:>4} "
+            f"backup {provider.served['backup']:>4}  primary error rate {stats.current_error_rate(time.monotonic()):.5f}"
+        )
+
+    if share < args.min_share:
+        print(f"FAIL: primary served {share:.0%} of the last window (want >= {args.min_share:.0%})")
+        sys.exit(1)
+    print(f"OK: primary served {share:.0%} of the last window")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
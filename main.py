@@ -1,11 +1,20 @@
+import asyncio
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from prometheus_fastapi_instrumentator import Instrumentator, metrics
 
 from app.api.main_router import api_router
 from app.middleware.logging_middleware import LoggingMiddleware
+from app.middleware.body_limit import BodyLimitMiddleware
 from app.db.mongo_session import connect_to_mongo, close_mongo_connection
-from app.utils.logger_util import logger
+from app.utils.llm_providers import close_providers
+from app.utils.extract_text_from_file import close_doc_extract_client
+from app.utils.webhook import close_webhook_client
+from app.utils.jd_store import cleanup_temp_files
+from app.utils import script_cache, idempotency
+from app.service import job_queue
+from app.core.config import job_queue_settings
+from app.utils.logger_util import logger, mongo_handler, ensure_log_indexes
 
 # Prometheus metrics setup
 instrumentator = (
@@ -20,12 +29,38 @@ async def lifespan(app: FastAPI):
     """Handles startup and shutdown events."""
     await connect_to_mongo()
     logger.info("Connected to MongoDB")
+    mongo_handler.start_writer()
+
+    try:
+        await script_cache.ensure_indexes()
+        await job_queue.ensure_indexes()
+        await idempotency.ensure_indexes()
+        await ensure_log_indexes()
+    except Exception as e:
+        logger.warning(f"Could not ensure indexes: {e}")
+
+    try:
+        await cleanup_temp_files()
+    except OSError as e:
+        logger.warning(f"Could not clean up JD store temp files: {e}")
+
+    stop_workers = asyncio.Event()
+    workers = job_queue.start_workers(stop_workers) if job_queue_settings.JOB_WORKER_ENABLED else []
+    if workers:
+        logger.info(f"Started {job_queue_settings.JOB_WORKER_CONCURRENCY} job queue workers")
+        logger.info("Started the callback dispatcher")
 
     instrumentator.expose(app)
     logger.info("Prometheus metrics exposed at /metrics")
 
     yield
 
+    await job_queue.stop_workers(stop_workers, workers)
+    await close_providers()
+    await close_doc_extract_client()
+    await close_webhook_client()
+    # drain queued request logs while Mongo is still connected
+    await mongo_handler.stop_writer()
     await close_mongo_connection()
     logger.info("Application shutdown complete.")
 
@@ -37,6 +72,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# ✅ Cap request bodies before they are spooled (inside the logging middleware, so 413s are logged)
+app.add_middleware(BodyLimitMiddleware)
+
 # ✅ Add logging middleware
 app.add_middleware(LoggingMiddleware)
 
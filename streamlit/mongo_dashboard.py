@@ -1,4 +1,10 @@
+import os
 from os import getenv
+from typing import Optional
+import csv
+import gzip
+import io
+import tempfile
 import streamlit as st
 import pandas as pd
 from pymongo import MongoClient
@@ -14,9 +20,155 @@ dotenv.load_dotenv()
 MONGO_URI = getenv("MONGO_URI", "mongodb://localhost:27017/")
 MONGO_DB_NAME = getenv("MONGO_DB_NAME", "callify")
 
-# Connect to MongoDB
-client = MongoClient(MONGO_URI)
-db = client[MONGO_DB_NAME]
+PAGE_SIZES = [25, 50, 100, 250]
+# filtered counts stop here; counting every match of a broad filter is a full scan
+COUNT_LIMIT = 10_000
+EXPORT_BATCH_SIZE = 1000
+# the finished export is held in memory for the download button, so it is capped
+EXPORT_MAX_ROWS = 100_000
+EXPORT_MAX_BYTES = 200 * 1024 * 1024
+
+
+@st.cache_resource
+def get_client() -> MongoClient:
+    # one client (and connection pool) per Streamlit server, not per rerun
+    return MongoClient(MONGO_URI)
+
+
+def get_db():
+    return get_client()[MONGO_DB_NAME]
+
+
+@st.cache_data(ttl=60)
+def list_collections() -> list:
+    return sorted(get_db().list_collection_names())
+
+
+@st.cache_data(ttl=60)
+def estimated_total(collection_name: str) -> int:
+    # metadata-based, O(1) regardless of collection size
+    return get_db()[collection_name].estimated_document_count()
+
+
+@st.cache_data(ttl=30)
+def filtered_count(collection_name: str, query: dict) -> int:
+    return get_db()[collection_name].count_documents(query, limit=COUNT_LIMIT)
+
+
+@st.cache_data(ttl=300)
+def sort_fields(collection_name: str) -> list:
+    """Keyset on (created_at, _id) where documents have created_at, else on _id alone."""
+    sample = get_db()[collection_name].find_one({}, {"created_at": 1})
+    if sample and "created_at" in sample:
+        return ["created_at", "_id"]
+    return ["_id"]
+
+
+def keyset_query(query: dict, fields: list, after: Optional[dict]) -> dict:
+    """Restrict query to documents sorted (descending) after the last row of the previous page."""
+    if not after:
+        return query
+    if fields == ["_id"]:
+        page_filter = {"_id": {"$lt": after["_id"]}}
+    else:
+        page_filter = {"$or": [
+            {"created_at": {"$lt": after["created_at"]}},
+            {"created_at": after["created_at"], "_id": {"$lt": after["_id"]}},
+        ]}
+    return {"$and": [query, page_filter]} if query else page_filter
+
+
+@st.cache_data(ttl=30)
+def fetch_page(collection_name: str, query: dict, after: Optional[dict], page_size: int) -> list:
+    fields = sort_fields(collection_name)
+    cursor = (
+        get_db()[collection_name]
+        .find(keyset_query(query, fields, after), {"logs": 0})  # logs are loaded per row on demand
+        .sort([(field, -1) for field in fields])
+        .limit(page_size)
+    )
+    return list(cursor)
+
+
+@st.cache_data(ttl=300)
+def fetch_logs(collection_name: str, doc_id) -> list:
+    doc = get_db()[collection_name].find_one({"_id": doc_id}, {"logs": 1})
+    return (doc or {}).get("logs") or []
+
+
+def _export_value(key: str, value):
+    if key == "logs" and isinstance(value, list):
+        # one JSON object per line, as the dashboard shows them
+        return "\n".join(json.dumps(log, ensure_ascii=False, default=str) for log in value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+def _export_columns(collection_name: str, query: dict) -> list:
+    """CSV columns: the first document's fields in order, then any other field seen, sorted."""
+    collection = get_db()[collection_name]
+    first = collection.find_one(query, {"_id": 0}) or {}
+    fields = collection.aggregate([
+        {"$match": query},
+        {"$limit": EXPORT_MAX_ROWS},
+        {"$project": {"fields": {"$objectToArray": "$$ROOT"}}},
+        {"$unwind": "$fields"},
+        {"$group": {"_id": "$fields.k"}},
+    ])
+    others = sorted(field["_id"] for field in fields if field["_id"] != "_id" and field["_id"] not in first)
+    return list(first) + others
+
+
+def _write_export(tmp, collection_name: str, query: dict, fmt: str, compress: bool) -> tuple[int, bool]:
+    raw = gzip.GzipFile(fileobj=tmp, mode="wb") if compress else tmp
+    out = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+    writer = None
+    if fmt != "ndjson":
+        writer = csv.DictWriter(out, fieldnames=_export_columns(collection_name, query))
+        writer.writeheader()
+
+    # one past the cap, to tell a capped export from one that fits exactly
+    cursor = get_db()[collection_name].find(query, {"_id": 0}).batch_size(EXPORT_BATCH_SIZE).limit(EXPORT_MAX_ROWS + 1)
+    rows = 0
+    truncated = False
+    for doc in cursor:
+        if rows >= EXPORT_MAX_ROWS or tmp.tell() >= EXPORT_MAX_BYTES:
+            truncated = True
+            break
+        if writer is None:
+            out.write(json.dumps(doc, ensure_ascii=False, default=str) + "\n")
+        else:
+            writer.writerow({key: _export_value(key, value) for key, value in doc.items()})
+        rows += 1
+    cursor.close()
+
+    out.flush()
+    out.detach()  # leave raw/tmp open
+    if compress:
+        raw.close()  # writes the gzip trailer; does not close tmp
+    return rows, truncated
+
+
+def export_documents(collection_name: str, query: dict, fmt: str, compress: bool):
+    """
+    Write matching documents to a temp file on disk as CSV or NDJSON, up to
+    EXPORT_MAX_ROWS documents or about EXPORT_MAX_BYTES of output.
+
+    Documents are read through a batched cursor and written one at a time.
+    Returns (path, row_count, truncated); the caller deletes the file.
+    """
+    suffix = f".{fmt}" + (".gz" if compress else "")
+    with tempfile.NamedTemporaryFile(mode="wb", suffix=suffix, delete=False) as tmp:
+        try:
+            rows, truncated = _write_export(tmp, collection_name, query, fmt, compress)
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+    return tmp.name, rows, truncated
+
 
 # -----------------------------
 # Streamlit App
@@ -28,16 +180,18 @@ st.title("📊 MongoDB Data Viewer with Search")
 st.sidebar.header("MongoDB Settings")
 
 # List all collections in the DB
-collections = db.list_collection_names()
+collections = list_collections()
 selected_collection = st.sidebar.selectbox("Select Collection", collections)
-
-collection = db[selected_collection]
+if not selected_collection:
+    st.warning("No collections found.")
+    st.stop()
 
 # --- Search/Filter Input ---
 st.sidebar.subheader("Search Filters")
 path_filter = st.sidebar.text_input("Search by Path (partial match)")
 job_id_filter = st.sidebar.text_input("Search by Job ID (exact match)")
 request_id_filter = st.sidebar.text_input("Search by Request ID (exact match)")
+page_size = st.sidebar.selectbox("Rows per page", PAGE_SIZES, index=1)
 
 # --- Build MongoDB Query ---
 query = {}
@@ -48,48 +202,94 @@ if job_id_filter:
 if request_id_filter:
     query["request_id"] = request_id_filter
 
+# --- Pagination state: one keyset cursor per visited page, reset when the view changes ---
+view_key = (selected_collection, json.dumps(query, sort_keys=True), page_size)
+if st.session_state.get("view_key") != view_key:
+    st.session_state.view_key = view_key
+    st.session_state.page_cursors = [None]
+page_cursors = st.session_state.page_cursors
+page_number = len(page_cursors)
+
 # --- Debug Info ---
 st.sidebar.subheader("Debug Info")
-total_docs = collection.count_documents({})
-filtered_docs = collection.count_documents(query)
-st.sidebar.write(f"Total documents in '{selected_collection}': {total_docs}")
-st.sidebar.write(f"Documents matching filters: {filtered_docs}")
+total_docs = estimated_total(selected_collection)
+filtered_docs = filtered_count(selected_collection, query)
+st.sidebar.write(f"Total documents in '{selected_collection}' (estimated): {total_docs}")
+st.sidebar.write(
+    f"Documents matching filters: {filtered_docs}{'+' if filtered_docs >= COUNT_LIMIT else ''}"
+)
 
 # --- Fetch Data ---
 try:
-    data = list(collection.find(query))  # fetch all matching documents
+    data = fetch_page(selected_collection, query, page_cursors[-1], page_size)
 except Exception as e:
     st.error(f"Error fetching data from MongoDB: {e}")
     st.stop()
 
+prev_col, page_col, next_col = st.columns([1, 2, 1])
+if prev_col.button("⬅️ Previous", disabled=page_number == 1):
+    page_cursors.pop()
+    st.rerun()
+page_col.write(f"Page {page_number}")
+if next_col.button("Next ➡️", disabled=len(data) < page_size):
+    last = data[-1]
+    page_cursors.append({field: last.get(field) for field in sort_fields(selected_collection)})
+    st.rerun()
+
 if not data:
     st.warning("No data found for the given search/filter.")
 else:
     # Convert Mongo documents → DataFrame
     df = pd.DataFrame(data)
-
-    # --- Flatten 'logs' array if present ---
-    if "logs" in df.columns:
-        def format_logs(log_list):
-            try:
-                # Convert each log object to JSON string
-                return "\n".join([json.dumps(log, ensure_ascii=False) for log in log_list])
-            except:
-                return ""
-        df["logs"] = df["logs"].apply(format_logs)
+    doc_ids = df["_id"].tolist()
 
     # Drop MongoDB _id column for cleaner view
-    if "_id" in df.columns:
-        df.drop(columns=["_id"], inplace=True)
-
-    # Display data table
-    st.dataframe(df, use_container_width=True)
-
-    # CSV download option
-    csv = df.to_csv(index=False).encode("utf-8")
-    st.download_button(
-        label="📥 Download as CSV",
-        data=csv,
-        file_name=f"{selected_collection}_filtered_data.csv",
-        mime="text/csv",
+    df.drop(columns=["_id"], inplace=True)
+
+    # Display data table; selecting a row loads its logs
+    event = st.dataframe(
+        df,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+    )
+
+    selected_rows = event.selection.rows
+    if selected_rows:
+        logs = fetch_logs(selected_collection, doc_ids[selected_rows[0]])
+        st.subheader("Logs")
+        if logs:
+            # one JSON object per line, as the table column used to show
+            st.code("\n".join(json.dumps(log, ensure_ascii=False) for log in logs), language="json")
+        else:
+            st.info("No logs stored for this document.")
+
+# --- Export: all documents matching the filters, not just the current page ---
+st.sidebar.subheader("Export")
+export_format = st.sidebar.radio("Format", ["csv", "ndjson"], horizontal=True)
+export_gzip = st.sidebar.checkbox("Gzip", value=True)
+# The file is read back once, for the download button of the run that prepared it,
+# and deleted straight away: nothing is left on disk and later reruns re-read nothing.
+# The button stays until the next interaction (on_click="ignore" does not rerun).
+if st.sidebar.button("Prepare export"):
+    with st.spinner("Exporting matching documents..."):
+        export_path, export_rows, export_truncated = export_documents(selected_collection, query, export_format, export_gzip)
+    if export_truncated:
+        st.sidebar.warning(
+            f"Export stopped after {export_rows} documents (limit: {EXPORT_MAX_ROWS} documents or "
+            f"{EXPORT_MAX_BYTES // (1024 * 1024)} MB). Narrow the filters to export the rest."
+        )
+    try:
+        with open(export_path, "rb") as export_file:
+            export_data = export_file.read()
+    finally:
+        os.remove(export_path)
+
+    suffix = f".{export_format}" + (".gz" if export_gzip else "")
+    st.sidebar.download_button(
+        label=f"📥 Download {'first ' if export_truncated else ''}{export_rows} documents",
+        data=export_data,
+        file_name=f"{selected_collection}_filtered_data{suffix}",
+        mime="application/gzip" if export_gzip else ("text/csv" if export_format == "csv" else "application/x-ndjson"),
+        on_click="ignore",
     )
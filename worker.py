@@ -0,0 +1,37 @@
+import asyncio
+import signal
+
+from app.core.config import job_queue_settings
+from app.db.mongo_session import connect_to_mongo, close_mongo_connection
+from app.service import job_queue
+from app.utils.llm_providers import close_providers
+from app.utils.extract_text_from_file import close_doc_extract_client
+from app.utils.webhook import close_webhook_client
+from app.utils.logger_util import logger
+
+
+async def main() -> None:
+    """Run job queue workers outside the API process (python worker.py)."""
+    await connect_to_mongo()
+    await job_queue.ensure_indexes()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    workers = job_queue.start_workers(stop)
+    logger.info(f"Started {job_queue_settings.JOB_WORKER_CONCURRENCY} job queue workers")
+    logger.info("Started the callback dispatcher")
+    await stop.wait()
+
+    await job_queue.stop_workers(stop, workers)
+    await close_providers()
+    await close_doc_extract_client()
+    await close_webhook_client()
+    await close_mongo_connection()
+    logger.info("Worker shutdown complete.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())